@@ -0,0 +1,111 @@
+import copy
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Set
+
+from autology_constructor.change_feed import ChangeEvent, ChangeFeed, get_change_feed
+from autology_constructor.ontology_fingerprint import ontology_fingerprint
+
+
+class AnalysisCache:
+    """领域分析结果缓存
+
+    按(分析类型, 各本体内容指纹, 参数)缓存OntologyAnalyzer的结果，主工作流、dreamer子图
+    和compare_domains共用同一份，同一本体的同类分析（包括其中的LLM调用）只执行一次。
+    本体发出变更事件时立即丢弃涉及它的条目；绕过变更流的修改也会改变指纹，不会命中旧结果。
+    结果以深拷贝存取，调用方修改返回值不影响缓存。
+    """
+
+    def __init__(self, cache_size: int = 64):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._keys_by_ontology: Dict[int, Set[Hashable]] = {}
+        self._feeds: Dict[int, ChangeFeed] = {}
+        self._lock = threading.Lock()
+
+    def _watch(self, ontology):
+        """订阅本体的变更流，本体变化时丢弃相关条目
+
+        监听器只记录本体的id，不持有本体本身；id被新本体复用时变更流随之更换，会重新订阅。
+        """
+        key = id(ontology)
+        feed = get_change_feed(ontology)
+        if self._feeds.get(key) is feed:
+            return
+        self._feeds[key] = feed
+        feed.subscribe(functools.partial(self._on_change, key))
+
+    def _on_change(self, ontology_id: int, event: ChangeEvent):
+        with self._lock:
+            self._drop_ontology(ontology_id)
+
+    def _remove(self, key: Hashable):
+        """删除一个条目，并从各本体的索引中移除它"""
+        ontology_ids, _ = self._cache.pop(key)
+        for ontology_id in ontology_ids:
+            keys = self._keys_by_ontology.get(ontology_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_ontology[ontology_id]
+
+    def _drop_ontology(self, ontology_id: int):
+        for key in list(self._keys_by_ontology.get(ontology_id, ())):
+            self._remove(key)
+
+    def get_or_compute(self, analysis_type: str, ontologies: Sequence, compute: Callable[[], Any],
+                       params: Hashable = (), cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """返回缓存的分析结果，未命中时调用compute计算并缓存
+
+        cacheable判断结果是否可以缓存，例如LLM调用失败或响应无法解析时返回False，
+        下次请求会重新计算而不是一直返回失败的结果。
+        """
+        key = (analysis_type, tuple(ontology_fingerprint(o) for o in ontologies), params)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return copy.deepcopy(self._cache[key][1])
+
+        result = compute()
+        if cacheable is not None and not cacheable(result):
+            return result
+
+        with self._lock:
+            ontology_ids = tuple(id(o) for o in ontologies)
+            if key in self._cache:
+                self._remove(key)
+            self._cache[key] = (ontology_ids, copy.deepcopy(result))
+            for ontology in ontologies:
+                self._watch(ontology)
+                self._keys_by_ontology.setdefault(id(ontology), set()).add(key)
+            while len(self._cache) > self.cache_size:
+                self._remove(next(iter(self._cache)))
+        return result
+
+    def invalidate(self, ontology=None):
+        """丢弃涉及某本体的所有条目，不指定本体时清空缓存"""
+        with self._lock:
+            if ontology is None:
+                self._cache.clear()
+                self._keys_by_ontology.clear()
+                return
+            self._drop_ontology(id(ontology))
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """获取进程内共享的分析缓存"""
+    global _cache
+    if _cache is None:
+        _cache = AnalysisCache()
+    return _cache
+
+
+def invalidate_analysis_cache(ontology=None):
+    get_analysis_cache().invalidate(ontology)
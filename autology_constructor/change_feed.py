@@ -0,0 +1,85 @@
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+CLASS_ADDED = "class_added"
+PARENT_ADDED = "parent_added"
+RESTRICTION_ADDED = "restriction_added"
+PROVENANCE_ADDED = "provenance_added"
+DISJOINTNESS_ADDED = "disjointness_added"
+INDIVIDUAL_ADDED = "individual_added"
+PROPERTY_ADDED = "property_added"
+# 整体改写（如压缩）后发出，订阅者应丢弃派生结构并整体重建
+ONTOLOGY_REWRITTEN = "ontology_rewritten"
+
+
+class ChangeEvent(NamedTuple):
+    """本体变更事件
+
+    Attributes:
+        version: 变更后的本体版本号
+        type: 事件类型（CLASS_ADDED等）
+        subject: 被修改实体的名称
+        details: 事件相关的其他信息（如父类名、属性名）
+    """
+    version: int
+    type: str
+    subject: str
+    details: Dict
+
+
+class ChangeFeed:
+    """本体变更流
+
+    合并函数和构建团队的create_*函数每修改一次本体就发出一个带类型的事件，
+    版本号单调递增。派生结构（名称索引、邻接表、闭包、向量索引、全文索引、分析缓存）
+    可订阅事件增量更新，或记录构建时的版本，之后通过changes_since取得增量。
+    """
+
+    def __init__(self, max_log: int = 10000):
+        self.version = 0
+        self._log = deque(maxlen=max_log)
+        self._subscribers: List[Callable[[ChangeEvent], None]] = []
+
+    def emit(self, type: str, subject: str, **details) -> ChangeEvent:
+        self.version += 1
+        event = ChangeEvent(self.version, type, subject, details)
+        self._log.append(event)
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"变更事件处理失败 {type} {subject}: {e}")
+        return event
+
+    def subscribe(self, callback: Callable[[ChangeEvent], None]):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ChangeEvent], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def changes_since(self, version: int) -> Optional[List[ChangeEvent]]:
+        """某版本之后的所有事件；日志已不再包含该版本之后的全部事件时返回None，调用方需整体重建"""
+        if version >= self.version:
+            return []
+        if not self._log or self._log[0].version > version + 1:
+            return None
+        return [event for event in self._log if event.version > version]
+
+
+_feeds: Dict[int, ChangeFeed] = {}
+_feed_owners: Dict[int, object] = {}
+
+
+def get_change_feed(ontology) -> ChangeFeed:
+    """获取本体的变更流，首次访问时创建"""
+    key = id(ontology)
+    if _feed_owners.get(key) is not ontology:
+        _feeds[key] = ChangeFeed()
+        _feed_owners[key] = ontology
+    return _feeds[key]
+
+
+def emit_change(ontology, type: str, subject: str, **details) -> ChangeEvent:
+    return get_change_feed(ontology).emit(type, subject, **details)
@@ -0,0 +1,143 @@
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, List
+
+from owlready2 import ThingClass, Restriction, SOME, ONLY
+
+from autology_constructor.hierarchy_closure import HierarchyClosure, get_hierarchy_closure, iter_bits
+
+
+class StructuralConsistencyChecker:
+    """轻量级结构一致性检查
+
+    基于层次闭包位集检测最常见的几类不一致，不依赖JVM，可在每次合并后运行：
+    1. 层次环：合并层级关系后出现的循环继承
+    2. 不相交子类：类（传递地）同时是两个不相交类的子类
+    3. 限制冲突：同一属性上only限制的填充类与some限制的填充类不相交，
+       或some限制的填充类本身不可满足
+    完整的Pellet推理只需定期运行。
+    """
+
+    def __init__(self, ontology, closure: HierarchyClosure = None):
+        self.ontology = ontology
+        self.closure = closure or get_hierarchy_closure(ontology)
+        self._disjoint_with = {}
+
+    def _disjoint_groups(self) -> List[List[str]]:
+        groups = []
+        for disjoint in self.ontology.disjoint_classes():
+            members = [c.name for c in disjoint.entities if isinstance(c, ThingClass)]
+            if len(members) > 1:
+                groups.append(members)
+        return groups
+
+    def _collect_restrictions(self) -> Dict[str, Dict[str, Dict[int, set]]]:
+        """类名 -> 属性名 -> {SOME/ONLY: 填充类名集合}，只收集命名类填充"""
+        restrictions = defaultdict(lambda: defaultdict(lambda: {SOME: set(), ONLY: set()}))
+        for cls in self.ontology.classes():
+            for r in cls.is_a:
+                if isinstance(r, Restriction) and r.type in (SOME, ONLY) and isinstance(r.value, ThingClass):
+                    restrictions[cls.name][r.property.name][r.type].add(r.value.name)
+        return restrictions
+
+    def _build_partners(self, groups: List[List[str]]):
+        # 每个类显式声明的不相交类（位集）
+        self._partners = defaultdict(int)
+        for members in groups:
+            ids = [self.closure.add_class(m) for m in members]
+            group_bits = 0
+            for i in ids:
+                group_bits |= 1 << i
+            for i in ids:
+                self._partners[i] |= group_bits & ~(1 << i)
+        self._disjoint_with = {}
+
+    def disjoint_with_bits(self, class_name: str) -> int:
+        """与该类不相交的所有类：其任一祖先所声明的不相交类的全部后代"""
+        bits = self._disjoint_with.get(class_name)
+        if bits is None:
+            bits = 0
+            for ancestor in iter_bits(self.closure.ancestor_bits(class_name)):
+                for partner in iter_bits(self._partners.get(ancestor, 0)):
+                    bits |= self.closure.descendant_bits(self.closure.names[partner])
+            self._disjoint_with[class_name] = bits
+        return bits
+
+    def check(self) -> Dict[str, List]:
+        """运行全部检查，返回各类问题及不可满足的类"""
+        closure = self.closure
+        groups = self._disjoint_groups()
+        self._build_partners(groups)
+
+        cycles = closure.cycles()
+
+        disjoint_subclasses = []
+        unsatisfiable = 0
+        for members in groups:
+            for a, b in combinations(members, 2):
+                common = closure.descendant_bits(a) & closure.descendant_bits(b)
+                if common:
+                    unsatisfiable |= common
+                    disjoint_subclasses.append({
+                        "classes": closure.names_of(common),
+                        "disjoint": [a, b]
+                    })
+
+        restrictions = self._collect_restrictions()
+        restricted = 0
+        for class_name in restrictions:
+            restricted |= 1 << closure.add_class(class_name)
+
+        conflicts = {}
+        for class_id in range(len(closure)):
+            class_name = closure.names[class_id]
+            ancestors = closure.ancestor_bits(class_name)
+            if not ancestors & restricted:
+                continue
+            # 合并自身及祖先上的限制
+            merged = defaultdict(lambda: {SOME: set(), ONLY: set()})
+            for ancestor in iter_bits(ancestors & restricted):
+                for prop_name, by_type in restrictions[closure.names[ancestor]].items():
+                    merged[prop_name][SOME] |= by_type[SOME]
+                    merged[prop_name][ONLY] |= by_type[ONLY]
+            for prop_name, by_type in merged.items():
+                for some_filler in by_type[SOME]:
+                    some_id = closure.add_class(some_filler)
+                    if (unsatisfiable >> some_id) & 1:
+                        key = (prop_name, None, some_filler)
+                        conflicts.setdefault(key, 0)
+                        conflicts[key] |= 1 << class_id
+                    for only_filler in by_type[ONLY]:
+                        if (self.disjoint_with_bits(only_filler) >> some_id) & 1:
+                            key = (prop_name, only_filler, some_filler)
+                            conflicts.setdefault(key, 0)
+                            conflicts[key] |= 1 << class_id
+
+        restriction_conflicts = []
+        for (prop_name, only_filler, some_filler), class_bits in conflicts.items():
+            unsatisfiable |= class_bits
+            # 只报告冲突最早出现的类，其后代继承同一冲突
+            origins = [
+                c for c in iter_bits(class_bits)
+                if not class_bits & closure.ancestor_bits(closure.names[c], include_self=False)
+            ]
+            restriction_conflicts.append({
+                "classes": [closure.names[c] for c in origins],
+                "affected": closure.names_of(class_bits),
+                "property": prop_name,
+                "only": only_filler,
+                "some": some_filler
+            })
+
+        # 层次环使环上的类等价而非不可满足，单独作为结构问题报告
+        return {
+            "cycles": cycles,
+            "disjoint_subclasses": disjoint_subclasses,
+            "restriction_conflicts": restriction_conflicts,
+            "unsatisfiable_classes": closure.names_of(unsatisfiable)
+        }
+
+
+def check_structural_consistency(ontology) -> Dict[str, List]:
+    """对本体运行轻量级结构一致性检查"""
+    return StructuralConsistencyChecker(ontology).check()
@@ -0,0 +1,157 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """内存映射的向量存储
+
+    向量以float32矩阵形式存放在旁路文件（embeddings.f32）中并内存映射，
+    行号与实体IRI的映射保存在embeddings.json中。向量不再作为OWL注释写入本体，
+    批量读取可直接返回映射矩阵的视图而无需复制。
+    """
+
+    DATA_FILE = "embeddings.f32"
+    INDEX_FILE = "embeddings.json"
+
+    def __init__(self, directory: str, dim: Optional[int] = None):
+        self.directory = directory
+        self.dim = dim
+        self.ids: Dict[str, int] = {}
+        self.iris: List[str] = []
+        self._matrix: Optional[np.memmap] = None
+        self._capacity = 0
+        self._load()
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.directory, self.DATA_FILE)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.dim = index["dim"]
+        self.iris = index["iris"]
+        self.ids = {iri: i for i, iri in enumerate(self.iris)}
+        self._open(max(len(self.iris), 1))
+
+    def _open(self, capacity: int):
+        """以指定行数容量映射数据文件，必要时扩展文件"""
+        os.makedirs(self.directory, exist_ok=True)
+        size = capacity * self.dim * 4
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.data_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._matrix = np.memmap(self.data_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self.iris)
+
+    def __contains__(self, iri: str) -> bool:
+        return iri in self.ids
+
+    def put(self, iri: str, vector: Sequence[float]) -> int:
+        """写入（或覆盖）实体的向量，返回其行号"""
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.dim is None:
+            self.dim = len(vector)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"向量维度为{vector.shape}，存储的维度为{self.dim}")
+        row = self.ids.get(iri)
+        if row is None:
+            row = len(self.iris)
+            if row >= self._capacity:
+                # 容量按倍数扩展，均摊写入开销
+                self._open(max(self._capacity * 2, 64))
+            self.ids[iri] = row
+            self.iris.append(iri)
+        self._matrix[row] = vector
+        return row
+
+    def put_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> int:
+        count = 0
+        for iri, vector in items:
+            self.put(iri, vector)
+            count += 1
+        return count
+
+    def get(self, iri: str) -> Optional[np.ndarray]:
+        """实体的向量（映射矩阵中的一行视图），不存在时返回None"""
+        row = self.ids.get(iri)
+        return None if row is None else self._matrix[row]
+
+    def matrix(self) -> np.ndarray:
+        """全部向量组成的矩阵视图，行顺序与iris一致，不复制数据"""
+        if self._matrix is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:len(self.iris)]
+
+    def rows(self, iris: Iterable[str]) -> np.ndarray:
+        """按给定顺序批量读取向量（复制），不存在的实体被跳过"""
+        indices = [self.ids[iri] for iri in iris if iri in self.ids]
+        return self.matrix()[indices]
+
+    def most_similar(self, vector: Sequence[float], k: int = 10) -> List[Tuple[str, float]]:
+        """按余弦相似度返回最相似的k个实体"""
+        matrix = self.matrix()
+        if not len(matrix):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = np.divide(matrix @ query, norms, out=np.zeros(len(matrix), dtype=np.float32), where=norms > 0)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.iris[i], float(scores[i])) for i in top]
+
+    def flush(self):
+        """将数据和行号映射写入磁盘"""
+        if self._matrix is None:
+            return
+        self._matrix.flush()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "iris": self.iris}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def migrate_from_ontology(self, ontology, remove: bool = True) -> int:
+        """将本体中的embedding注释迁移到存储中
+
+        Args:
+            remove: 迁移后是否从本体中删除embedding注释
+        """
+        migrated = 0
+        entities = list(ontology.classes()) + list(ontology.individuals()) + list(ontology.data_properties())
+        for entity in entities:
+            vector = getattr(entity, "embedding", None)
+            if not vector or len(vector) != (self.dim or len(vector)):
+                continue
+            self.put(entity.iri, [float(v) for v in vector])
+            if remove:
+                entity.embedding = []
+            migrated += 1
+        self.flush()
+        return migrated
+
+
+_stores: Dict[str, EmbeddingStore] = {}
+
+
+def get_embedding_store(directory: str) -> EmbeddingStore:
+    """获取指定目录的共享向量存储"""
+    store = _stores.get(directory)
+    if store is None:
+        store = _stores[directory] = EmbeddingStore(directory)
+    return store
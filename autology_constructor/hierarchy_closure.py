@@ -0,0 +1,177 @@
+from typing import Dict, Iterator, List, Optional
+
+from owlready2 import Thing, ThingClass
+
+from autology_constructor.change_feed import ChangeEvent, get_change_feed, CLASS_ADDED, PARENT_ADDED
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """按从低到高的顺序遍历位集中被置位的ID"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class HierarchyClosure:
+    """类层次的传递闭包缓存
+
+    每个类被分配一个整数ID，祖先和后代闭包以Python整数位集存储（自反，即包含类自身），
+    因此包含关系判断为O(1)，公共祖先和最近公共祖先查询只需按位运算。
+    新增父类边时增量更新闭包，无需重新遍历整个本体。
+    """
+
+    def __init__(self, ontology=None):
+        self.ontology = ontology
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._parents: List[int] = []
+        self._ancestors: List[int] = []
+        self._descendants: List[int] = []
+        if ontology is not None:
+            self.build(ontology)
+
+    def build(self, ontology):
+        """从本体的is_a关系重建闭包"""
+        self.ontology = ontology
+        self.ids = {}
+        self.names = []
+        self._parents = []
+        self._ancestors = []
+        self._descendants = []
+        self.add_class(Thing.name)
+        for cls in ontology.classes():
+            self.add_class(cls.name)
+            for parent in cls.is_a:
+                if isinstance(parent, ThingClass):
+                    self.add_edge(cls.name, parent.name)
+
+    def __contains__(self, class_name: str) -> bool:
+        return class_name in self.ids
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_class(self, class_name: str) -> int:
+        """注册类并返回其ID，已存在时直接返回原ID"""
+        class_id = self.ids.get(class_name)
+        if class_id is None:
+            class_id = len(self.names)
+            self.ids[class_name] = class_id
+            self.names.append(class_name)
+            self._parents.append(0)
+            self._ancestors.append(1 << class_id)
+            self._descendants.append(1 << class_id)
+        return class_id
+
+    def add_edge(self, child: str, parent: str) -> bool:
+        """增量添加子类 -> 父类边
+
+        Returns:
+            该边此前不存在时返回True
+        """
+        child_id = self.add_class(child)
+        parent_id = self.add_class(parent)
+        if (self._parents[child_id] >> parent_id) & 1:
+            return False
+        self._parents[child_id] |= 1 << parent_id
+
+        # child的每个后代都获得parent的全部祖先，parent的每个祖先都获得child的全部后代
+        new_ancestors = self._ancestors[parent_id]
+        new_descendants = self._descendants[child_id]
+        for d in iter_bits(new_descendants):
+            self._ancestors[d] |= new_ancestors
+        for a in iter_bits(new_ancestors):
+            self._descendants[a] |= new_descendants
+        return True
+
+    def class_id(self, class_name: str) -> Optional[int]:
+        return self.ids.get(class_name)
+
+    def parent_bits(self, class_name: str) -> int:
+        return self._parents[self.ids[class_name]]
+
+    def ancestor_bits(self, class_name: str, include_self: bool = True) -> int:
+        class_id = self.ids[class_name]
+        bits = self._ancestors[class_id]
+        return bits if include_self else bits & ~(1 << class_id)
+
+    def descendant_bits(self, class_name: str, include_self: bool = True) -> int:
+        class_id = self.ids[class_name]
+        bits = self._descendants[class_id]
+        return bits if include_self else bits & ~(1 << class_id)
+
+    def names_of(self, bits: int) -> List[str]:
+        return [self.names[i] for i in iter_bits(bits)]
+
+    def is_subclass_of(self, child: str, parent: str) -> bool:
+        """判断child是否（传递地）是parent的子类，类自身视为自己的子类"""
+        child_id = self.ids.get(child)
+        parent_id = self.ids.get(parent)
+        if child_id is None or parent_id is None:
+            return False
+        return bool((self._ancestors[child_id] >> parent_id) & 1)
+
+    def ancestors(self, class_name: str, include_self: bool = True) -> List[str]:
+        return self.names_of(self.ancestor_bits(class_name, include_self))
+
+    def descendants(self, class_name: str, include_self: bool = True) -> List[str]:
+        return self.names_of(self.descendant_bits(class_name, include_self))
+
+    def common_ancestors(self, class1: str, class2: str) -> List[str]:
+        return self.names_of(self.ancestor_bits(class1) & self.ancestor_bits(class2))
+
+    def lowest_common_ancestors(self, class1: str, class2: str) -> List[str]:
+        """公共祖先中没有更低公共祖先的那些类"""
+        common = self.ancestor_bits(class1) & self.ancestor_bits(class2)
+        lowest = [
+            c for c in iter_bits(common)
+            if not (self._descendants[c] & ~(1 << c) & common)
+        ]
+        return [self.names[c] for c in lowest]
+
+    def apply(self, event: ChangeEvent):
+        """按本体变更事件增量更新闭包"""
+        if event.type == CLASS_ADDED:
+            self.add_class(event.subject)
+            for parent in event.details.get("parents", []):
+                self.add_edge(event.subject, parent)
+        elif event.type == PARENT_ADDED:
+            self.add_edge(event.subject, event.details["parent"])
+
+    def cycles(self) -> List[str]:
+        """处于层次环中的类（其某个严格祖先同时也是其后代）"""
+        return [
+            self.names[i] for i in range(len(self.names))
+            if self._ancestors[i] & self._descendants[i] & ~(1 << i)
+        ]
+
+
+_closures: Dict[int, HierarchyClosure] = {}
+
+
+def get_hierarchy_closure(ontology, rebuild: bool = False) -> HierarchyClosure:
+    """获取本体的闭包缓存，首次访问时构建"""
+    closure = _closures.get(id(ontology))
+    if closure is None or closure.ontology is not ontology:
+        closure = _closures[id(ontology)] = HierarchyClosure(ontology)
+        # 订阅变更流，之后新增的类和父类边增量并入闭包
+        get_change_feed(ontology).subscribe(closure.apply)
+    elif rebuild:
+        closure.build(ontology)
+    return closure
+
+
+def peek_hierarchy_closure(ontology) -> Optional[HierarchyClosure]:
+    """返回已构建的闭包缓存，尚未构建时返回None"""
+    closure = _closures.get(id(ontology))
+    if closure is not None and closure.ontology is ontology:
+        return closure
+    return None
+
+
+def discard_hierarchy_closure(ontology):
+    """丢弃闭包缓存，下次访问时重新构建"""
+    closure = _closures.pop(id(ontology), None)
+    if closure is not None and closure.ontology is ontology:
+        get_change_feed(ontology).unsubscribe(closure.apply)
@@ -0,0 +1,170 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from autology_constructor.hierarchy_closure import iter_bits
+
+ENTITY_TYPES = ("class", "object_property", "data_property")
+CLASS, OBJECT_PROPERTY, DATA_PROPERTY = range(len(ENTITY_TYPES))
+
+_ARRAYS = (
+    "entity_types", "provenance_counts", "property_counts",
+    "subclass_indptr", "subclass_indices",
+    "property_indptr", "property_indices", "property_labels"
+)
+
+
+def _csr_arrays(rows: List[List[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Build CSR indptr/indices/labels from per-row (column, label) lists"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indices = []
+    labels = []
+    for i, row in enumerate(rows):
+        for column, label in sorted(set(row)):
+            indices.append(column)
+            labels.append(label)
+        indptr[i + 1] = len(indices)
+    return indptr, np.asarray(indices, dtype=np.int32), np.asarray(labels, dtype=np.int32)
+
+
+class GraphSnapshot:
+    """Columnar snapshot of the ontology graph for analytics
+
+    Entities (classes first, then object and data properties) get dense
+    interned IDs. Subclass edges (child -> parent) and object-property edges
+    (class -> related class, labelled with the property ID) are stored as CSR
+    arrays, together with per-class property and provenance counts. Saved as .npy files,
+    the arrays can be memory-mapped back in milliseconds, without touching
+    owlready2 objects.
+    """
+
+    def __init__(self, names: List[str], arrays: Dict[str, np.ndarray], version: Optional[int] = None):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.arrays = arrays
+        self.version = version
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get("arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    @property
+    def n_entities(self) -> int:
+        return len(self.names)
+
+    @property
+    def class_ids(self) -> np.ndarray:
+        return np.flatnonzero(self.entity_types == CLASS)
+
+    @classmethod
+    def from_tools(cls, tools, version: Optional[int] = None) -> "GraphSnapshot":
+        """Export the graph through the indexes an OntologyTools instance already maintains"""
+        onto = tools.onto
+        entities = [(c.name, CLASS) for c in onto.classes()]
+        entities += [(p.name, OBJECT_PROPERTY) for p in onto.object_properties()]
+        entities += [(p.name, DATA_PROPERTY) for p in onto.data_properties()]
+        ids = {}
+        types = []
+        for name, entity_type in entities:
+            if name not in ids:
+                ids[name] = len(types)
+                types.append(entity_type)
+        names = list(ids)
+        n_classes = types.count(CLASS)
+
+        # 子类边来自层次闭包的直接父类位集
+        closure = tools._get_closure()
+        subclass_rows = []
+        for name in names[:n_classes]:
+            parents = closure.parent_bits(name) if name in closure else 0
+            subclass_rows.append([
+                (ids[closure.names[p]], 0) for p in iter_bits(parents) if closure.names[p] in ids
+            ])
+
+        # 属性边来自OntologyTools的邻接索引
+        forward, _ = tools._get_adjacency()
+        property_rows = []
+        for name in names[:n_classes]:
+            property_rows.append([
+                (ids[target], ids[prop_name])
+                for prop_name, targets in forward.get(name, {}).items() if prop_name in ids
+                for target in targets if target in ids
+            ])
+
+        property_counts = np.zeros(len(names), dtype=np.int32)
+        for onto_class in onto.classes():
+            property_counts[ids[onto_class.name]] = len(tools._class_properties(onto_class))
+
+        provenance = np.zeros(len(names), dtype=np.int32)
+        counts = tools.get_provenance().counts()
+        for onto_class in onto.classes():
+            provenance[ids[onto_class.name]] = counts.get(onto_class.iri, 0)
+
+        subclass_indptr, subclass_indices, _ = _csr_arrays(subclass_rows)
+        property_indptr, property_indices, property_labels = _csr_arrays(property_rows)
+        arrays = {
+            "entity_types": np.asarray(types, dtype=np.int8),
+            "provenance_counts": provenance,
+            "property_counts": property_counts,
+            "subclass_indptr": subclass_indptr,
+            "subclass_indices": subclass_indices,
+            "property_indptr": property_indptr,
+            "property_indices": property_indices,
+            "property_labels": property_labels
+        }
+        return cls(names, arrays, version)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), self.arrays[name])
+        with open(os.path.join(directory, "entities.json"), "w", encoding="utf-8") as f:
+            json.dump({"names": self.names, "types": list(ENTITY_TYPES), "version": self.version}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "GraphSnapshot":
+        with open(os.path.join(directory, "entities.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in _ARRAYS}
+        return cls(meta["names"], arrays, meta.get("version"))
+
+    def _class_matrix(self, indptr, indices, data=None) -> sparse.csr_matrix:
+        n_classes = len(indptr) - 1
+        if data is None:
+            data = np.ones(len(indices), dtype=np.float32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(n_classes, self.n_entities))[:, :n_classes]
+
+    def subclass_matrix(self) -> sparse.csr_matrix:
+        """Class x class matrix with 1 where the row class is a direct subclass of the column class"""
+        return self._class_matrix(self.subclass_indptr, self.subclass_indices)
+
+    def property_matrix(self, properties: Optional[Iterable[str]] = None) -> sparse.csr_matrix:
+        """Class x class matrix counting object-property edges, optionally restricted to some properties"""
+        data = np.ones(len(self.property_indices), dtype=np.float32)
+        if properties is not None:
+            wanted = [self.ids[p] for p in properties if p in self.ids]
+            data = np.isin(self.property_labels, wanted).astype(np.float32)
+        return self._class_matrix(self.property_indptr, self.property_indices, data)
+
+    def degree_distribution(self) -> Dict[str, np.ndarray]:
+        """Per-class in/out degrees of the subclass and property graphs"""
+        sub = self.subclass_matrix()
+        prop = self.property_matrix()
+        return {
+            "subclass_out": np.diff(sub.indptr),
+            "subclass_in": np.bincount(sub.indices, minlength=sub.shape[0]),
+            "property_out": np.diff(prop.indptr),
+            "property_in": np.bincount(prop.indices, minlength=prop.shape[0])
+        }
+
+    def connected_components(self) -> Tuple[int, np.ndarray]:
+        """Weakly connected components of the combined subclass and property graph"""
+        graph = self.subclass_matrix() + self.property_matrix()
+        return csgraph.connected_components(graph, directed=True, connection="weak")
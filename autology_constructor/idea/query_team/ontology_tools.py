@@ -1,9 +1,24 @@
-from typing import List, Tuple, Dict, Optional, Set
+import json
+import time
+from collections import deque
+from typing import List, Tuple, Dict, Optional, Set, Iterator
+import numpy as np
 from owlready2 import *
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 
 from autology_constructor.idea.query_team.utils import parse_json
+from autology_constructor.reasoning_service import get_reasoning_service
+from autology_constructor.consistency_checker import StructuralConsistencyChecker
+from autology_constructor.change_feed import get_change_feed
+from autology_constructor.analysis_cache import AnalysisCache, get_analysis_cache, invalidate_analysis_cache
+from autology_constructor.hierarchy_closure import HierarchyClosure, get_hierarchy_closure, discard_hierarchy_closure
+from autology_constructor.idea.query_team.semantic_similarity import SemanticSimilarityIndex
+from autology_constructor.idea.query_team.graph_snapshot import GraphSnapshot
+from autology_constructor.idea.query_team.graph_centrality import ConceptCentrality
+from autology_constructor.idea.query_team.sparql_executor import SparqlExecutor
+from autology_constructor.provenance_store import ProvenanceStore, Provenance, OwlProvenance, get_ontology_provenance_store
+from autology_constructor.provenance_search import ProvenanceSearchIndex, get_ontology_provenance_search_index
 
 
 class OntologyTools:
@@ -15,10 +30,75 @@ class OntologyTools:
     3. Hierarchy Operations: Navigate and analyze class hierarchies
     4. Semantic Analysis: Analyze relationships and similarities
     5. Parsing Operations: Parse complete definitions and structures
+    6. SPARQL Operations: Run set-oriented queries on the native SPARQL engine
+    7. Graph Export: Columnar CSR snapshots for analytics
     """
     
-    def __init__(self, ontology):
+    def __init__(self, ontology, provenance_store: Optional[ProvenanceStore] = None,
+                 search_index: Optional[ProvenanceSearchIndex] = None):
+        self._onto = None
+        self._cache = {}
         self.onto = ontology
+        self._provenance_store = provenance_store
+        self._search_index = search_index
+
+    @property
+    def provenance(self) -> Optional[ProvenanceStore]:
+        """Provenance side table, or None when provenance is kept as SourcedInformation individuals"""
+        if self._provenance_store is not None:
+            return self._provenance_store
+        return get_ontology_provenance_store(self.onto)
+
+    def get_provenance(self) -> Provenance:
+        """Provenance records from whichever backend holds them"""
+        store = self.provenance
+        return store if store is not None else OwlProvenance(self.onto)
+
+    @property
+    def onto(self):
+        return self._onto
+
+    @onto.setter
+    def onto(self, ontology):
+        # 切换本体时丢弃所有预计算索引
+        self._onto = ontology
+        self._cache = {}
+        self._cache_version = self._ontology_version()
+
+    def _ontology_version(self) -> int:
+        return get_change_feed(self._onto).version if self._onto is not None else 0
+
+    def refresh(self):
+        """Drop precomputed indexes after the ontology has been modified"""
+        self._cache = {}
+        discard_hierarchy_closure(self.onto)
+        invalidate_analysis_cache(self.onto)
+
+    def _cached(self, key: str, builder):
+        # 本体版本变化后丢弃预计算索引（层次闭包由合并函数增量维护，无需丢弃）
+        version = self._ontology_version()
+        if version != self._cache_version:
+            self._cache = {}
+            self._cache_version = version
+        if key not in self._cache:
+            self._cache[key] = builder()
+        return self._cache[key]
+
+    def _build_name_index(self) -> Dict[str, object]:
+        """Index classes and properties by name across the namespaces they are created in"""
+        index = {}
+        for entity in self.onto.classes():
+            index.setdefault(entity.name, entity)
+        for entity in self.onto.properties():
+            index.setdefault(entity.name, entity)
+        return index
+
+    def _lookup(self, name: str):
+        """Resolve an entity name; merged entities live in classes/, data_properties/, ... rather than the base IRI"""
+        entity = self.onto[name]
+        if entity is None:
+            entity = self._cached("name_index", self._build_name_index).get(name)
+        return entity
 
     #######################
     # Basic Information
@@ -26,7 +106,13 @@ class OntologyTools:
     
     def get_class_info(self, class_name: str) -> Dict:
         """Get basic information about a class"""
-        cls = self.onto[class_name]
+        cls = self._lookup(class_name)
+        if self.provenance is not None:
+            return {
+                "name": cls.name,
+                "information": self.provenance.contents(cls.iri),
+                "source": self.provenance.sources(cls.iri)
+            }
         return {
             "name": cls.name,
             "information": list(cls.information) if hasattr(cls, "information") else [],
@@ -35,15 +121,61 @@ class OntologyTools:
     
     def get_information_sources(self, class_name: str) -> List[str]:
         """Get all information sources of a class"""
-        cls = self.onto[class_name]
+        cls = self._lookup(class_name)
+        if self.provenance is not None:
+            return self.provenance.sources(cls.iri)
         return list(cls.source) if hasattr(cls, "source") else []
 
     def get_information_by_source(self, class_name: str, source: str) -> List[str]:
         """Get information from a specific source for a class"""
-        cls = self.onto[class_name]
+        cls = self._lookup(class_name)
+        if self.provenance is not None:
+            return self.provenance.contents(cls.iri, source)
         if not hasattr(cls, "has_information"):
             return []
-        return [info.content for info in cls.has_information if info.source == source]
+        return [content for info in cls.has_information if source in info.source for content in info.content]
+
+    def get_search_index(self) -> ProvenanceSearchIndex:
+        """Full-text index over provenance; an in-memory index is built if none is attached to the ontology"""
+        if self._search_index is not None:
+            return self._search_index
+        index = get_ontology_provenance_search_index(self.onto)
+        if index is not None:
+            return index
+        return self._cached("search_index", self._build_search_index)
+
+    def _build_search_index(self) -> ProvenanceSearchIndex:
+        index = ProvenanceSearchIndex()
+        index.rebuild(self.get_provenance())
+        return index
+
+    def search_information(self, query: str, limit: int = 20, source: Optional[str] = None) -> List[Dict]:
+        """BM25-ranked search over provenance content, source and file path
+
+        Returns:
+            Matching records with the class name, content, source, file path and score
+        """
+        results = []
+        for record in self.get_search_index().search(query, limit=limit, source=source):
+            entity = self.onto.world[record["entity_iri"]]
+            if entity is None:
+                continue
+            results.append({
+                "class": entity.name,
+                "content": record["content"],
+                "source": record["source"],
+                "file_path": record["file_path"],
+                "score": record["score"]
+            })
+        return results
+
+    def find_classes_by_evidence(self, query: str, limit: int = 20) -> List[str]:
+        """Classes whose evidence mentions the query, best match first"""
+        classes = []
+        for record in self.search_information(query, limit=limit * 5):
+            if record["class"] not in classes:
+                classes.append(record["class"])
+        return classes[:limit]
 
     #######################
     # Property Operations
@@ -51,7 +183,10 @@ class OntologyTools:
     
     def get_class_properties(self, class_name: str) -> List[str]:
         """Get all properties associated with a class"""
-        cls = self.onto[class_name]
+        return self._class_properties(self._lookup(class_name))
+
+    @staticmethod
+    def _class_properties(cls: ThingClass) -> List[str]:
         properties = set()
         
         # Get properties from restrictions
@@ -60,26 +195,44 @@ class OntologyTools:
                 properties.add(r.property.name)
         
         # Get directly declared properties
-        for prop in cls.get_properties():
+        for prop in cls.get_class_properties():
             properties.add(prop.name)
             
         return sorted(list(properties))
     
     def get_property_restrictions(self, class_name: str, property_name: str) -> List[Dict]:
         """Get all restrictions on a specific property for a class"""
-        cls = self.onto[class_name]
+        cls = self._lookup(class_name)
         restrictions = []
         
         for r in cls.is_a:
             if isinstance(r, Restriction) and r.property.name == property_name:
-                restrictions.append({
-                    "type": str(r.type),
-                    "value": str(r.value),
-                    "raw_value": r.value  # Keep the original value for further processing
-                })
+                restrictions.append(self._restriction_info(r))
         
         return restrictions
     
+    @staticmethod
+    def _restriction_info(r: Restriction) -> Dict:
+        return {
+            "type": str(r.type),
+            "value": str(r.value),
+            "raw_value": r.value  # Keep the original value for further processing
+        }
+    
+    def _build_property_usage(self) -> Dict[str, List[Tuple[str, Dict]]]:
+        """Build the property -> [(class, restriction)] index in one pass over the classes"""
+        usage = {}
+        for cls in self.onto.classes():
+            for r in cls.is_a:
+                if isinstance(r, Restriction):
+                    usage.setdefault(r.property.name, []).append((cls.name, self._restriction_info(r)))
+        return usage
+    
+    def get_property_usage(self, property_name: str) -> List[Tuple[str, Dict]]:
+        """Get all (class, restriction) pairs where a property is restricted"""
+        usage = self._cached("property_usage", self._build_property_usage)
+        return list(usage.get(property_name, []))
+    
     def get_property_values(self, class_name: str, property_name: str) -> Set:
         """Get all values associated with a property for a class"""
         restrictions = self.get_property_restrictions(class_name, property_name)
@@ -100,107 +253,252 @@ class OntologyTools:
     
     def get_parents(self, class_name: str) -> List[str]:
         """Get direct parent classes"""
-        cls = self.onto[class_name]
+        cls = self._lookup(class_name)
         return [c.name for c in cls.is_a if isinstance(c, ThingClass)]
     
     def get_children(self, class_name: str) -> List[str]:
         """Get direct child classes"""
-        cls = self.onto[class_name]
+        cls = self._lookup(class_name)
         return [c.name for c in cls.subclasses()]
     
+    def _get_closure(self) -> HierarchyClosure:
+        return get_hierarchy_closure(self.onto)
+    
     def get_ancestors(self, class_name: str) -> List[str]:
         """Get all ancestor classes"""
-        cls = self.onto[class_name]
-        return [c.name for c in cls.ancestors() if isinstance(c, ThingClass)]
+        return self._get_closure().ancestors(class_name)
     
     def get_descendants(self, class_name: str) -> List[str]:
         """Get all descendant classes"""
-        cls = self.onto[class_name]
-        return [c.name for c in cls.descendants() if isinstance(c, ThingClass)]
+        return self._get_closure().descendants(class_name)
+    
+    def is_subclass_of(self, class_name: str, parent_name: str) -> bool:
+        """Check whether a class is a (transitive) subclass of another class"""
+        return self._get_closure().is_subclass_of(class_name, parent_name)
+    
+    def get_common_ancestors(self, class1: str, class2: str) -> List[str]:
+        """Get ancestor classes shared by two classes"""
+        return self._get_closure().common_ancestors(class1, class2)
+    
+    def get_lowest_common_ancestors(self, class1: str, class2: str) -> List[str]:
+        """Get the most specific ancestor classes shared by two classes"""
+        return self._get_closure().lowest_common_ancestors(class1, class2)
 
     #######################
     # Semantic Analysis
     #######################
     
-    def get_related_classes(self, class_name: str) -> Dict[str, List[str]]:
-        """Get classes related through object properties"""
-        cls = self.onto[class_name]
-        relations = {}
+    def _build_adjacency(self) -> Tuple[Dict[str, Dict[str, List[str]]], Dict[str, List[Tuple[str, str]]]]:
+        """Build forward and reverse object-property adjacency in one pass over the classes"""
+        object_properties = set(self.onto.object_properties())
+        forward = {}
+        reverse = {}
         
-        # 获取所有对象属性
-        for prop in self.onto.object_properties():
-            related = []
+        for cls in self.onto.classes():
+            relations = {}
             # 通过限制获取关联的类
             for r in cls.is_a:
-                if isinstance(r, Restriction) and r.property == prop:
-                    if isinstance(r.value, ThingClass):
-                        related.append(r.value.name)
-                    elif hasattr(r.value, "__iter__"):
-                        related.extend(v.name for v in r.value if isinstance(v, ThingClass))
+                if isinstance(r, Restriction) and r.property in object_properties:
+                    relations.setdefault(r.property.name, set()).update(self._filler_names(r.value))
             
             # 通过直接属性值获取关联的类
-            if hasattr(cls, prop.name):
-                values = getattr(cls, prop.name)
-                if isinstance(values, list):
-                    related.extend(v.name for v in values if isinstance(v, ThingClass))
-                elif isinstance(values, ThingClass):
-                    related.append(values.name)
+            for prop in cls.get_class_properties():
+                if prop in object_properties:
+                    values = getattr(cls, prop.python_name)
+                    values = values if isinstance(values, list) else [values]
+                    names = [v.name for v in values if isinstance(v, ThingClass)]
+                    if names:
+                        relations.setdefault(prop.name, set()).update(names)
             
-            if related:
-                relations[prop.name] = sorted(list(set(related)))  # 去重并排序
-                
-        return relations
+            forward[cls.name] = {}
+            for prop_name, related in sorted(relations.items()):
+                if not related:
+                    continue
+                forward[cls.name][prop_name] = sorted(related)  # 去重并排序
+                for target in related:
+                    reverse.setdefault(target, []).append((prop_name, cls.name))
+                    
+        return forward, reverse
+    
+    def _get_adjacency(self) -> Tuple[Dict[str, Dict[str, List[str]]], Dict[str, List[Tuple[str, str]]]]:
+        return self._cached("adjacency", self._build_adjacency)
+    
+    @staticmethod
+    def _filler_names(value) -> List[str]:
+        if isinstance(value, ThingClass):
+            return [value.name]
+        if hasattr(value, "__iter__"):
+            return [v.name for v in value if isinstance(v, ThingClass)]
+        return []
+    
+    def get_related_classes(self, class_name: str) -> Dict[str, List[str]]:
+        """Get classes related through object properties"""
+        forward, _ = self._get_adjacency()
+        return {prop_name: list(related) for prop_name, related in forward.get(class_name, {}).items()}
 
-    def get_property_path(self, start_class: str, end_class: str, max_depth: int = 5) -> List[List[str]]:
+    def get_property_path(self, start_class: str, end_class: str, max_depth: int = 5,
+                          max_paths: Optional[int] = None, timeout: Optional[float] = None,
+                          shortest_only: bool = False) -> List[List[str]]:
         """Find property paths connecting two classes"""
-        paths = []
-        visited = set()
+        return list(self.iter_property_paths(
+            start_class, end_class,
+            max_depth=max_depth,
+            max_paths=max_paths,
+            timeout=timeout,
+            shortest_only=shortest_only
+        ))
+    
+    def iter_property_paths(self, start_class: str, end_class: str, max_depth: int = 5,
+                            max_paths: Optional[int] = None, timeout: Optional[float] = None,
+                            shortest_only: bool = False) -> Iterator[List[str]]:
+        """Yield property paths connecting two classes, shortest first
         
-        def dfs(current: str, target: str, path: List[str], depth: int):
-            if depth > max_depth:
-                return
-            if current == target:
-                paths.append(path[:])
-                return
-            if current in visited:
-                return
-                
-            visited.add(current)
-            for prop_name, related in self.get_related_classes(current).items():
-                for cls in related:
-                    if cls not in visited:
-                        dfs(cls, target, path + [prop_name], depth + 1)
-            visited.remove(current)
+        A bidirectional BFS over the precomputed adjacency finds the shortest
+        distance; simple paths of each length up to max_depth are then
+        enumerated with pruning on the distance to end_class. Iteration stops
+        after max_paths paths or once timeout seconds have elapsed.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        forward, reverse = self._get_adjacency()
         
-        dfs(start_class, end_class, [], 0)
-        return paths
-    
-    def get_semantic_similarity(self, class1: str, class2: str) -> float:
-        """Calculate semantic similarity between two classes"""
-        cls1 = self.onto[class1]
-        cls2 = self.onto[class2]
+        shortest = self._bidirectional_distance(start_class, end_class, max_depth, deadline)
+        if shortest is None:
+            return
+        if shortest == 0:
+            yield []
+            return
         
-        # 计算属性重叠度
-        props1 = set(self.get_class_properties(class1))
-        props2 = set(self.get_class_properties(class2))
-        prop_sim = len(props1 & props2) / len(props1 | props2) if props1 or props2 else 0
+        # 到终点的距离用于剪枝：剩余步数不足时不再扩展
+        distance_to_end = self._bounded_distances(end_class, reverse, max_depth, deadline)
+        if distance_to_end is None:
+            return
         
-        # 计算共同祖先
-        ancestors1 = set(self.get_ancestors(class1))
-        ancestors2 = set(self.get_ancestors(class2))
-        ancestor_sim = len(ancestors1 & ancestors2) / len(ancestors1 | ancestors2) if ancestors1 or ancestors2 else 0
+        found = 0
+        longest = shortest if shortest_only else max_depth
+        for length in range(shortest, longest + 1):
+            nodes = [start_class]
+            props = []
+            on_path = {start_class}
+            stack = [iter(self._edges(start_class, forward))]
+            while stack:
+                if deadline is not None and time.monotonic() > deadline:
+                    return
+                step = next(stack[-1], None)
+                if step is None:
+                    stack.pop()
+                    on_path.discard(nodes.pop())
+                    if props:
+                        props.pop()
+                    continue
+                prop_name, target = step
+                remaining = length - len(props) - 1
+                if target in on_path or distance_to_end.get(target, max_depth + 1) > remaining:
+                    continue
+                if target == end_class:
+                    if remaining == 0:
+                        yield props + [prop_name]
+                        found += 1
+                        if max_paths is not None and found >= max_paths:
+                            return
+                    continue
+                nodes.append(target)
+                props.append(prop_name)
+                on_path.add(target)
+                stack.append(iter(self._edges(target, forward)))
+    
+    @staticmethod
+    def _edges(class_name: str, forward: Dict[str, Dict[str, List[str]]]) -> Iterator[Tuple[str, str]]:
+        for prop_name, related in forward.get(class_name, {}).items():
+            for target in related:
+                yield prop_name, target
+    
+    def _bidirectional_distance(self, start_class: str, end_class: str, max_depth: int,
+                                deadline: Optional[float]) -> Optional[int]:
+        """Length of the shortest property path, or None if there is none within max_depth"""
+        if start_class == end_class:
+            return 0
+        forward, reverse = self._get_adjacency()
+        dist_start = {start_class: 0}
+        dist_end = {end_class: 0}
+        frontier_start = [start_class]
+        frontier_end = [end_class]
         
-        # 计算信息内容相似度
-        info1 = set(info.content for info in cls1.has_information) if hasattr(cls1, "has_information") else set()
-        info2 = set(info.content for info in cls2.has_information) if hasattr(cls2, "has_information") else set()
-        info_sim = len(info1 & info2) / len(info1 | info2) if info1 or info2 else 0
+        while frontier_start and frontier_end:
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            # 每次扩展较小的一侧
+            expand_start = len(frontier_start) <= len(frontier_end)
+            frontier = frontier_start if expand_start else frontier_end
+            dist, other = (dist_start, dist_end) if expand_start else (dist_end, dist_start)
+            best = None
+            next_frontier = []
+            for node in frontier:
+                if expand_start:
+                    neighbours = (target for _, target in self._edges(node, forward))
+                else:
+                    neighbours = (source for _, source in reverse.get(node, []))
+                for neighbour in neighbours:
+                    if neighbour in dist:
+                        continue
+                    dist[neighbour] = dist[node] + 1
+                    if neighbour in other:
+                        total = dist[neighbour] + other[neighbour]
+                        best = total if best is None else min(best, total)
+                    next_frontier.append(neighbour)
+            if best is not None:
+                return best if best <= max_depth else None
+            if expand_start:
+                frontier_start = next_frontier
+            else:
+                frontier_end = next_frontier
+            if max(dist_start.values()) + max(dist_end.values()) >= max_depth:
+                return None
+        return None
+    
+    @staticmethod
+    def _bounded_distances(end_class: str, reverse: Dict[str, List[Tuple[str, str]]], max_depth: int,
+                           deadline: Optional[float]) -> Optional[Dict[str, int]]:
+        """BFS distances to end_class along reversed edges, up to max_depth"""
+        distances = {end_class: 0}
+        queue = deque([end_class])
+        while queue:
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            node = queue.popleft()
+            if distances[node] >= max_depth:
+                continue
+            for _, source in reverse.get(node, []):
+                if source not in distances:
+                    distances[source] = distances[node] + 1
+                    queue.append(source)
+        return distances
+    
+    def get_similarity_index(self) -> SemanticSimilarityIndex:
+        """Get the sparse feature index used for batch semantic similarity"""
+        return self._cached("similarity_index", lambda: SemanticSimilarityIndex.from_tools(self))
+    
+    def get_semantic_similarity(self, class1: str, class2: str) -> float:
+        """Calculate semantic similarity between two classes
         
-        # 加权平均
-        return 0.4 * prop_sim + 0.4 * ancestor_sim + 0.2 * info_sim
+        Weighted Jaccard over properties (0.4), ancestors (0.4) and
+        information contents (0.2).
+        """
+        return self.get_similarity_index().similarity(class1, class2)
+    
+    def get_similarity_matrix(self, class_names: List[str] = None) -> Tuple[List[str], np.ndarray]:
+        """Calculate semantic similarity for all pairs of classes"""
+        return self.get_similarity_index().similarity_matrix(class_names)
+    
+    def get_most_similar_classes(self, class_name: str, k: int = 10) -> List[Dict]:
+        """Get the k classes most semantically similar to a class"""
+        return [
+            {"class": name, "similarity": score}
+            for name, score in self.get_similarity_index().top_k(class_name, k)
+        ]
     
     def get_disjoint_classes(self, class_name: str) -> List[str]:
         """Get classes that are explicitly declared as disjoint"""
-        cls = self.onto[class_name]
+        cls = self._lookup(class_name)
         disjoint = set()
         
         for d in cls.disjoints():
@@ -209,15 +507,60 @@ class OntologyTools:
         disjoint.discard(class_name)  # Remove the class itself
         return sorted(list(disjoint))
     
-    def get_inconsistent_classes(self) -> List[str]:
-        """Get all inconsistent classes in the ontology"""
-        close_world(self.onto)
-        with self.onto:
-            sync_reasoner_pellet(
-                infer_property_values = True,
-                infer_data_property_values = True
-            )
-        return [cls.name for cls in default_world.inconsistent_classes()]
+    def get_inconsistent_classes(self, seed_classes: List[str] = None, timeout: float = None) -> List[str]:
+        """Get all inconsistent classes in the ontology
+        
+        The reasoner runs on a copy in a subprocess and results are cached by
+        ontology fingerprint. With seed_classes, only the module around those
+        classes (their parents, equivalents, disjoint classes and restriction
+        signatures) is reasoned over.
+        
+        Raises OwlReadyInconsistentOntologyError when the ontology (or module)
+        as a whole is inconsistent, as running the reasoner in-process does.
+        """
+        service = get_reasoning_service()
+        if seed_classes:
+            result = service.reason_module(self.onto, [self._lookup(name) for name in seed_classes], timeout=timeout)
+        else:
+            result = service.reason(self.onto, timeout=timeout)
+        if not result["consistent"]:
+            raise OwlReadyInconsistentOntologyError()
+        return result["inconsistent_classes"]
+
+    def check_structural_consistency(self) -> Dict[str, List]:
+        """Detect hierarchy cycles, disjoint-subclass and only/some conflicts without a reasoner"""
+        return StructuralConsistencyChecker(self.onto, self._get_closure()).check()
+
+    def get_graph_snapshot(self) -> GraphSnapshot:
+        """Columnar snapshot of the class graph for sparse-matrix analytics"""
+        return self._cached("graph_snapshot", lambda: GraphSnapshot.from_tools(self, self._ontology_version()))
+
+    def export_graph_snapshot(self, directory: str) -> GraphSnapshot:
+        """Write the columnar snapshot as memory-mappable .npy files"""
+        snapshot = self.get_graph_snapshot()
+        snapshot.save(directory)
+        return snapshot
+
+    def get_concept_centrality(self) -> ConceptCentrality:
+        """Degree, PageRank, betweenness, property richness and provenance scores for every class"""
+        return self._cached("concept_centrality", lambda: ConceptCentrality.from_snapshot(self.get_graph_snapshot()))
+    
+    #######################
+    # SPARQL Operations
+    #######################
+    
+    def _get_sparql_executor(self) -> SparqlExecutor:
+        return self._cached("sparql_executor", lambda: SparqlExecutor(self.onto))
+    
+    def run_sparql(self, query: str, params: List = None, timeout: float = 30, limit: int = None) -> Dict:
+        """Run a SPARQL query (parameters as ??1, ??2, ...) and return formatted rows"""
+        return self._get_sparql_executor().query(query, params or (), timeout, limit)
+    
+    def find_classes_with_restriction(self, property_name: str, value_class: str) -> List[str]:
+        """Get all classes with a some/only restriction on a property to a given class"""
+        return self._get_sparql_executor().classes_with_restriction(
+            self._lookup(property_name), self._lookup(value_class)
+        )
 
     #######################
     # Parsing Operations
@@ -240,7 +583,7 @@ class OntologyTools:
         
         # 获取所有属性
         for prop_name in self.get_class_properties(class_name):
-            prop = self.onto[prop_name]
+            prop = self._lookup(prop_name)
             if isinstance(prop, owlready2.DataProperty):
                 result["properties"]["data"].append({
                     "name": prop_name,
@@ -258,7 +601,7 @@ class OntologyTools:
     
     def parse_property_definition(self, property_name: str) -> Dict:
         """Parse complete property definition"""
-        prop = self.onto[property_name]
+        prop = self._lookup(property_name)
         result = {
             "name": property_name,
             "type": "data" if isinstance(prop, owlready2.DataProperty) else "object",
@@ -267,31 +610,46 @@ class OntologyTools:
             "usage": []
         }
         
-        # 查找所有使用该属性的类
-        for cls in self.onto.classes():
-            restrictions = self.get_property_restrictions(cls.name, property_name)
-            if restrictions:
-                result["usage"].append({
-                    "class": cls.name,
-                    "restrictions": restrictions
-                })
+        # 通过倒排索引查找所有使用该属性的类
+        usage = {}
+        for class_name, restriction in self.get_property_usage(property_name):
+            usage.setdefault(class_name, []).append(restriction)
+        for class_name, restrictions in usage.items():
+            result["usage"].append({
+                "class": class_name,
+                "restrictions": restrictions
+            })
                 
         return result
     
-    def parse_hierarchy_structure(self, root_class: str = None) -> Dict:
-        """Parse complete hierarchy structure"""
-        visited = set()  # 添加循环检测
+    def parse_hierarchy_structure(self, root_class: str = None, dag: bool = False):
+        """Parse complete hierarchy structure
         
-        def build_tree(cls_name):
-            if cls_name in visited:
-                return {"name": cls_name, "cyclic": True}
-            visited.add(cls_name)
-            tree = {
-                "name": cls_name,
-                "info": self.get_class_info(cls_name),
-                "children": [build_tree(c) for c in self.get_children(cls_name)]
-            }
-            visited.remove(cls_name)
+        By default a nested tree is returned, in which classes with several
+        parents are repeated under each of them. With dag=True the compact
+        DAG form of parse_hierarchy_dag is returned instead.
+        """
+        if dag:
+            return self.parse_hierarchy_dag(root_class)
+        
+        def build_tree(root_name):
+            tree = {"name": root_name, "info": self.get_class_info(root_name), "children": []}
+            on_path = {root_name}  # 循环检测
+            stack = [(tree, iter(self.get_children(root_name)))]
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    stack.pop()
+                    on_path.discard(node["name"])
+                    continue
+                if child in on_path:
+                    node["children"].append({"name": child, "cyclic": True})
+                    continue
+                subtree = {"name": child, "info": self.get_class_info(child), "children": []}
+                node["children"].append(subtree)
+                on_path.add(child)
+                stack.append((subtree, iter(self.get_children(child))))
             return tree
             
         if root_class:
@@ -300,13 +658,91 @@ class OntologyTools:
             top_classes = [cls.name for cls in self.onto.classes() 
                          if not self.get_parents(cls.name)]
             return [build_tree(cls) for cls in top_classes]
+    
+    def _build_hierarchy_edges(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """Collect parent and child lists between the ontology's own classes in one pass"""
+        classes = list(self.onto.classes())
+        class_set = set(classes)
+        parents = {cls.name: [] for cls in classes}
+        children = {cls.name: [] for cls in classes}
+        for cls in classes:
+            for parent in cls.is_a:
+                if isinstance(parent, ThingClass) and parent in class_set:
+                    parents[cls.name].append(parent.name)
+                    children[parent.name].append(cls.name)
+        return parents, children
+    
+    def _hierarchy_order(self, root_class: str = None) -> Tuple[List[str], List[str]]:
+        """Roots and a breadth-first ordering of the classes to serialize"""
+        parents, children = self._cached("hierarchy_edges", self._build_hierarchy_edges)
+        if root_class:
+            roots = [root_class]
+        else:
+            roots = [name for name, class_parents in parents.items() if not class_parents]
+        order = list(roots)
+        seen = set(roots)
+        queue = deque(roots)
+        while queue:
+            for child in children.get(queue.popleft(), []):
+                if child not in seen:
+                    seen.add(child)
+                    order.append(child)
+                    queue.append(child)
+        if not root_class:
+            # 仅在环中、没有根可达的类
+            order.extend(name for name in parents if name not in seen)
+        return roots, order
+    
+    def iter_hierarchy_dag(self, root_class: str = None, include_info: bool = True) -> Iterator[Dict]:
+        """Yield each class of the hierarchy once, with integer IDs for its parents and children"""
+        parents, children = self._cached("hierarchy_edges", self._build_hierarchy_edges)
+        _, order = self._hierarchy_order(root_class)
+        ids = {name: i for i, name in enumerate(order)}
+        for name in order:
+            node = {
+                "id": ids[name],
+                "name": name,
+                "parents": [ids[p] for p in parents.get(name, []) if p in ids],
+                "children": [ids[c] for c in children.get(name, []) if c in ids]
+            }
+            if include_info:
+                node["info"] = self.get_class_info(name)
+            yield node
+    
+    def parse_hierarchy_dag(self, root_class: str = None, include_info: bool = True) -> Dict:
+        """Parse the hierarchy as a DAG in which every class is emitted exactly once"""
+        roots, _ = self._hierarchy_order(root_class)
+        return {
+            "roots": list(range(len(roots))),
+            "classes": list(self.iter_hierarchy_dag(root_class, include_info))
+        }
+    
+    def write_hierarchy_dag(self, fp, root_class: str = None, include_info: bool = True):
+        """Stream the DAG form of the hierarchy to a text file object as JSON"""
+        roots, _ = self._hierarchy_order(root_class)
+        fp.write('{"roots": %s, "classes": [' % json.dumps(list(range(len(roots)))))
+        for i, node in enumerate(self.iter_hierarchy_dag(root_class, include_info)):
+            if i:
+                fp.write(", ")
+            fp.write(json.dumps(node, ensure_ascii=False))
+        fp.write("]}")
 
 class OntologyAnalyzer:
-    """本体分析工具 - 专注于本体结构分析"""
+    """本体分析工具 - 专注于本体结构分析
+    
+    分析结果默认存入进程内共享的分析缓存，工作流各节点和子图中的分析器
+    对同一本体的同类分析只计算一次。
+    """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[AnalysisCache] = None):
         self.llm = ChatOpenAI(temperature=0)
         self.tools = OntologyTools(None)
+        self.cache = cache or get_analysis_cache()
+    
+    @staticmethod
+    def _is_parsed(result) -> bool:
+        """LLM响应是否解析成了JSON对象；parse_json失败时返回空列表，这类结果不缓存"""
+        return isinstance(result, dict) and bool(result)
         
     def analyze_domain_structure(self, ontology) -> Dict:
         """分析领域的基本结构
@@ -314,10 +750,17 @@ class OntologyAnalyzer:
         - 属性分布
         - 层次结构
         """
+        return self.cache.get_or_compute(
+            "domain_structure", [ontology], lambda: self._analyze_domain_structure(ontology),
+            cacheable=self._is_parsed
+        )
+    
+    def _analyze_domain_structure(self, ontology) -> Dict:
         self.tools.onto = ontology
-        hierarchy = self.tools.parse_hierarchy_structure()
+        hierarchy = self.tools.parse_hierarchy_dag()  # DAG形式，每个类只出现一次
         
         structure_info = {
+            "classes": [node["name"] for node in hierarchy["classes"]],
             "hierarchy": hierarchy,  # 只保留一份层次结构
             "properties": [self.tools.parse_property_definition(p.name) 
                          for p in ontology.properties()]
@@ -349,42 +792,57 @@ class OntologyAnalyzer:
         response = self.llm.invoke(prompt.format_messages(**structure_info))
         return parse_json(response.content)
     
-    def find_key_concepts(self, ontology) -> List[Dict]:
+    def find_key_concepts(self, ontology, top_k: int = 20) -> List[Dict]:
         """识别关键概念
         - 概念的中心度
         - 属性丰富度
         - 连接模式
+        
+        中心度、属性丰富度和来源数量在本地用稀疏矩阵计算，
+        只将得分最高的top_k个候选概念交给LLM评估研究潜力。
         """
+        return self.cache.get_or_compute(
+            "key_concepts", [ontology], lambda: self._find_key_concepts(ontology, top_k), params=(top_k,),
+            cacheable=self._is_parsed
+        )
+    
+    def _find_key_concepts(self, ontology, top_k: int) -> List[Dict]:
         self.tools.onto = ontology
         
-        # 获取本体信息
+        # 本地计算结构得分，只取前top_k个候选
+        candidates = self.tools.get_concept_centrality().top_k(top_k)
         classes_info = []
-        for cls in ontology.classes():
-            class_info = {
-                "name": cls.name,
-                "properties": self.tools.get_class_properties(cls.name),
-                "parents": self.tools.get_parents(cls.name),
-                "children": self.tools.get_children(cls.name),
-                "related": self.tools.get_related_classes(cls.name)
-            }
-            classes_info.append(class_info)
+        used_properties = set()
+        for candidate in candidates:
+            name = candidate["name"]
+            properties = self.tools.get_class_properties(name)
+            used_properties.update(properties)
+            classes_info.append({
+                **candidate,
+                "properties": properties,
+                "parents": self.tools.get_parents(name),
+                "related": self.tools.get_related_classes(name)
+            })
             
         relationships = []
         for prop in ontology.properties():
-            rel = self.tools.parse_property_definition(prop.name)
-            relationships.append(rel)
+            if prop.name in used_properties:
+                relationships.append(self.tools.parse_property_definition(prop.name))
             
         prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert in identifying key concepts in scientific domains."""),
-            ("user", """Analyze these ontology concepts:
+            ("user", """Analyze these candidate key concepts:
             
             Classes: {classes}
             Relationships: {relationships}
             
-            Identify key concepts based on:
+            Each candidate comes with precomputed structural scores
+            (score, degree, pagerank, betweenness, property_richness, provenance).
+            Use them as the measure of:
             1. Centrality in the network
             2. Property richness
             3. Connection patterns
+            and judge:
             4. Research potential
             
             Format as JSON with:
@@ -397,7 +855,10 @@ class OntologyAnalyzer:
             classes=classes_info,
             relationships=relationships
         ))
-        return parse_json(response.content)
+        result = parse_json(response.content)
+        if isinstance(result, dict):
+            result["structural_scores"] = candidates
+        return result
         
     def compare_domains(self, source_ontology, target_ontology) -> Dict:
         """比较两个领域的基本结构
@@ -405,10 +866,17 @@ class OntologyAnalyzer:
         - 结构差异
         - 属性对应
         """
+        return self.cache.get_or_compute(
+            "compare_domains", [source_ontology, target_ontology],
+            lambda: self._compare_domains(source_ontology, target_ontology),
+            cacheable=self._is_parsed
+        )
+    
+    def _compare_domains(self, source_ontology, target_ontology) -> Dict:
         # 分析源领域
         self.tools.onto = source_ontology
         source_structure = {
-            "hierarchy": self.tools.parse_hierarchy_structure(),
+            "hierarchy": self.tools.parse_hierarchy_dag(),
             "properties": [self.tools.parse_property_definition(p.name) 
                          for p in source_ontology.properties()],
             "key_concepts": self.find_key_concepts(source_ontology)
@@ -417,7 +885,7 @@ class OntologyAnalyzer:
         # 分析目标领域
         self.tools.onto = target_ontology
         target_structure = {
-            "hierarchy": self.tools.parse_hierarchy_structure(),
+            "hierarchy": self.tools.parse_hierarchy_dag(),
             "properties": [self.tools.parse_property_definition(p.name) 
                          for p in target_ontology.properties()],
             "key_concepts": self.find_key_concepts(target_ontology)
@@ -3,6 +3,10 @@ from src.agents.base_agent import AgentTemplate
 from langchain.prompts import ChatPromptTemplate
 import json
 
+from .ontology_tools import OntologyTools
+from .sparql_executor import SparqlExecutor
+from .utils import parse_json, extract_sparql_query
+
 class QueryParserAgent(AgentTemplate):
     """自然语言查询解析器 (无工具版本)"""
     def __init__(self):
@@ -92,6 +96,16 @@ class SparqlExpertAgent(AgentTemplate):
             query=json.dumps(query_desc, ensure_ascii=False)
         ))
         return response.content
+    
+    def execute_sparql(self, query_desc: Dict, ontology: Any, timeout: float = 30, limit: int = None) -> Dict:
+        """生成SPARQL并在owlready2原生SPARQL引擎上执行"""
+        query = extract_sparql_query(self.generate_sparql(query_desc))
+        try:
+            results = SparqlExecutor(ontology).query(query, timeout=timeout, limit=limit)
+            results["query"] = query
+            return results
+        except Exception as e:
+            return {"error": str(e), "query": query}
 
 class ValidationAgent(AgentTemplate):
     """结果验证专家"""
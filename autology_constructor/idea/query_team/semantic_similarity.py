@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from autology_constructor.hierarchy_closure import iter_bits
+
+
+def _incidence_matrix(rows: List[Iterable[int]], n_features: int) -> sparse.csr_matrix:
+    """Build a binary class x feature CSR matrix from per-class feature IDs"""
+    indptr = [0]
+    indices = []
+    for features in rows:
+        indices.extend(sorted(set(features)))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix(
+        (data, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(rows), n_features)
+    )
+
+
+class SemanticSimilarityIndex:
+    """Batch semantic similarity over sparse class x feature incidence matrices
+
+    Each feature group (properties, ancestors, information contents) is a
+    binary CSR matrix. Intersections for a block of classes against all
+    classes are one sparse product; unions follow from the row sums, so the
+    weighted Jaccard of OntologyTools.get_semantic_similarity is computed for
+    many pairs at once.
+    """
+
+    WEIGHTS = {
+        "properties": 0.4,
+        "ancestors": 0.4,
+        "information": 0.2
+    }
+
+    def __init__(self, class_names: List[str], matrices: Dict[str, sparse.csr_matrix]):
+        self.class_names = class_names
+        self.ids = {name: i for i, name in enumerate(class_names)}
+        self.matrices = matrices
+        self._transposed = {group: m.T.tocsr() for group, m in matrices.items()}
+        self._sizes = {group: np.asarray(m.sum(axis=1)).ravel() for group, m in matrices.items()}
+
+    @classmethod
+    def from_tools(cls, tools) -> "SemanticSimilarityIndex":
+        """Collect the feature sets of every class through an OntologyTools instance"""
+        closure = tools._get_closure()
+        property_ids = {}
+        information_ids = {}
+        class_names = []
+        rows = {group: [] for group in cls.WEIGHTS}
+        contents_by_iri = {}
+        for record in tools.get_provenance().all_records():
+            contents_by_iri.setdefault(record["entity_iri"], []).append(record["content"])
+
+        for onto_class in tools.onto.classes():
+            name = onto_class.name
+            class_names.append(name)
+            rows["properties"].append([
+                property_ids.setdefault(p, len(property_ids)) for p in tools.get_class_properties(name)
+            ])
+            rows["ancestors"].append(list(iter_bits(closure.ancestor_bits(name))))
+            rows["information"].append([
+                information_ids.setdefault(v, len(information_ids)) for v in contents_by_iri.get(onto_class.iri, ())
+            ])
+
+        matrices = {
+            "properties": _incidence_matrix(rows["properties"], len(property_ids)),
+            "ancestors": _incidence_matrix(rows["ancestors"], len(closure)),
+            "information": _incidence_matrix(rows["information"], len(information_ids))
+        }
+        return cls(class_names, matrices)
+
+    def _block_similarity(self, rows: np.ndarray) -> np.ndarray:
+        """Weighted Jaccard of the given rows against every class"""
+        result = np.zeros((len(rows), len(self.class_names)), dtype=np.float64)
+        for group, weight in self.WEIGHTS.items():
+            intersection = (self.matrices[group][rows] @ self._transposed[group]).toarray()
+            sizes = self._sizes[group]
+            union = sizes[rows][:, None] + sizes[None, :] - intersection
+            result += weight * np.divide(intersection, union, out=np.zeros_like(intersection, dtype=np.float64), where=union > 0)
+        return result
+
+    def similarity(self, class1: str, class2: str) -> float:
+        row = self._block_similarity(np.array([self.ids[class1]]))
+        return float(row[0, self.ids[class2]])
+
+    def similarity_matrix(self, class_names: List[str] = None, block_size: int = 512) -> Tuple[List[str], np.ndarray]:
+        """All-pairs similarity for the given classes (all classes by default)"""
+        names = class_names if class_names is not None else self.class_names
+        ids = np.array([self.ids[n] for n in names], dtype=np.int64)
+        matrix = np.empty((len(ids), len(ids)), dtype=np.float64)
+        for start in range(0, len(ids), block_size):
+            block = self._block_similarity(ids[start:start + block_size])
+            matrix[start:start + block_size] = block[:, ids]
+        return list(names), matrix
+
+    def top_k(self, class_name: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Most similar classes to one class, excluding itself"""
+        return next(self.iter_top_k(k, class_names=[class_name]))[1]
+
+    def iter_top_k(self, k: int = 10, class_names: List[str] = None,
+                   block_size: int = 512) -> Iterator[Tuple[str, List[Tuple[str, float]]]]:
+        """Yield (class, [(neighbour, score), ...]) for each class, block by block"""
+        names = class_names if class_names is not None else self.class_names
+        ids = np.array([self.ids[n] for n in names], dtype=np.int64)
+        k = min(k, len(self.class_names) - 1)
+        for start in range(0, len(ids), block_size):
+            block_ids = ids[start:start + block_size]
+            block = self._block_similarity(block_ids)
+            block[np.arange(len(block_ids)), block_ids] = -1.0
+            if k <= 0:
+                for class_id in block_ids:
+                    yield self.class_names[class_id], []
+                continue
+            candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            for row, class_id in enumerate(block_ids):
+                order = candidates[row][np.argsort(-block[row, candidates[row]], kind="stable")]
+                yield self.class_names[class_id], [
+                    (self.class_names[j], float(block[row, j])) for j in order
+                ]
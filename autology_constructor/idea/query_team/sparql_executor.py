@@ -0,0 +1,111 @@
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from autology_constructor.idea.query_team.utils import format_sparql_results
+
+
+# All named classes restricted on property ??1 with filler ??2 (some or only)
+CLASSES_WITH_RESTRICTION_QUERY = """
+SELECT DISTINCT ?cls WHERE {
+    ?cls rdfs:subClassOf ?restriction .
+    ?restriction owl:onProperty ??1 .
+    { ?restriction owl:someValuesFrom ??2 . } UNION { ?restriction owl:allValuesFrom ??2 . }
+}
+"""
+
+_END = object()
+
+
+class SparqlTimeoutError(TimeoutError):
+    """Raised when a SPARQL query runs past its timeout"""
+
+
+class SparqlExecutor:
+    """Execute SPARQL queries with owlready2's native SPARQL engine
+
+    Queries are compiled once with World.prepare_sparql and kept in a small
+    LRU cache, so repeated queries only rebind their ??N parameters. Rows are
+    yielded as they are produced. The timeout is enforced inside SQLite
+    through a progress handler that is only installed while a row is being
+    fetched.
+    """
+
+    def __init__(self, ontology, cache_size: int = 128, default_timeout: Optional[float] = 30):
+        self.onto = ontology
+        self.cache_size = cache_size
+        self.default_timeout = default_timeout
+        self._prepared = OrderedDict()
+
+    @property
+    def world(self):
+        return self.onto.world
+
+    def prepare(self, query: str):
+        """Compile a query, or reuse the cached compiled query"""
+        prepared = self._prepared.get(query)
+        if prepared is None:
+            prepared = self.world.prepare_sparql(query)
+            self._prepared[query] = prepared
+            if len(self._prepared) > self.cache_size:
+                self._prepared.popitem(last=False)
+        else:
+            self._prepared.move_to_end(query)
+        return prepared
+
+    def execute(self, query: str, params: Sequence[Any] = (), timeout: Optional[float] = None,
+                limit: Optional[int] = None) -> Iterator[List]:
+        """Yield result rows one at a time
+
+        Args:
+            query: SPARQL query, using ??1, ??2, ... for parameters
+            params: values bound to the parameters, in order
+            timeout: seconds before SparqlTimeoutError is raised (default_timeout if None)
+            limit: maximum number of rows to yield
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        prepared = self.prepare(query)
+
+        rows = self._guarded(deadline, lambda: iter(prepared.execute(list(params))))
+        count = 0
+        while limit is None or count < limit:
+            row = self._guarded(deadline, lambda: next(rows, _END))
+            if row is _END:
+                return
+            yield row
+            count += 1
+
+    def _guarded(self, deadline: Optional[float], step):
+        """Run one step of query evaluation with the SQLite interrupt armed"""
+        if deadline is None:
+            return step()
+        if time.monotonic() > deadline:
+            raise SparqlTimeoutError("SPARQL query timed out")
+        db = self.world.graph.db
+        db.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, 1000)
+        try:
+            return step()
+        except sqlite3.OperationalError as e:
+            if time.monotonic() > deadline:
+                raise SparqlTimeoutError("SPARQL query timed out") from e
+            raise
+        finally:
+            db.set_progress_handler(None, 0)
+
+    def query(self, query: str, params: Sequence[Any] = (), timeout: Optional[float] = None,
+              limit: Optional[int] = None) -> Dict[str, Any]:
+        """Execute a query and return rows keyed by the projected variable names"""
+        variables = [name.lstrip("?") for name in self.prepare(query).column_names]
+        rows = [tuple(row) for row in self.execute(query, params, timeout, limit)]
+        results = format_sparql_results(rows, variables)
+        results["variables"] = variables
+        return results
+
+    def classes_with_restriction(self, prop, value_class, timeout: Optional[float] = None) -> List[str]:
+        """Names of all classes restricted (some/only) on prop with filler value_class"""
+        return [
+            row[0].name
+            for row in self.execute(CLASSES_WITH_RESTRICTION_QUERY, (prop, value_class), timeout)
+        ]
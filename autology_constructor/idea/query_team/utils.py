@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Union
 from owlready2 import Thing, ThingClass
 import json
+import re
 
 def parse_json(content: str) -> List[Dict]:
     """解析JSON格式的执行计划
@@ -45,11 +46,12 @@ def format_owlready2_value(value: Any) -> Union[str, List[str], Dict]:
     else:
         return str(value)
 
-def format_sparql_results(results: List) -> Dict[str, Any]:
+def format_sparql_results(results: List, variables: List[str] = None) -> Dict[str, Any]:
     """格式化SPARQL查询结果
     
     Args:
         results: SPARQL查询返回的结果列表
+        variables: 查询投影的变量名，未给出时按位置命名为var0, var1, ...
         
     Returns:
         格式化后的结果字典
@@ -58,6 +60,8 @@ def format_sparql_results(results: List) -> Dict[str, Any]:
         >>> results = [(Thing("calixarene"), "binds", Thing("metal_ion"))]
         >>> format_sparql_results(results)
         {'results': [{'var0': 'calixarene', 'var1': 'binds', 'var2': 'metal_ion'}]}
+        >>> format_sparql_results(results, ["host", "relation", "guest"])
+        {'results': [{'host': 'calixarene', 'relation': 'binds', 'guest': 'metal_ion'}]}
     """
     formatted = []
     
@@ -65,7 +69,8 @@ def format_sparql_results(results: List) -> Dict[str, Any]:
         if isinstance(result, tuple):
             item = {}
             for i, value in enumerate(result):
-                item[f"var{i}"] = format_owlready2_value(value)
+                key = variables[i] if variables and i < len(variables) else f"var{i}"
+                item[key] = format_owlready2_value(value)
             formatted.append(item)
         else:
             formatted.append({"result": format_owlready2_value(result)})
@@ -86,10 +91,25 @@ def extract_variables_from_sparql(query: str) -> List[str]:
         >>> extract_variables_from_sparql(query)
         ['x', 'y']
     """
-    import re
     variables = re.findall(r'\?(\w+)', query)
     return list(dict.fromkeys(variables))  # 去重保持顺序
 
+def extract_sparql_query(content: str) -> str:
+    """从LLM回复中提取SPARQL语句（去掉Markdown代码块标记）
+    
+    Args:
+        content: LLM返回的文本
+        
+    Returns:
+        SPARQL查询字符串
+        
+    Example:
+        >>> extract_sparql_query("```sparql\nSELECT ?x WHERE { ?x a owl:Class }\n```")
+        'SELECT ?x WHERE { ?x a owl:Class }'
+    """
+    match = re.search(r'```(?:sparql)?\s*(.*?)```', content, re.DOTALL | re.IGNORECASE)
+    return (match.group(1) if match else content).strip()
+
 def format_query_results(results: Dict, variables: List[str] = None) -> str:
     """Format query results as readable string"""
     if not results or 'results' not in results:
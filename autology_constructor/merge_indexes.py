@@ -0,0 +1,302 @@
+import types
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Set, Tuple
+
+from owlready2 import Thing, ThingClass, AllDisjoint, And, Or, Not, Restriction, destroy_entity
+
+from autology_constructor.provenance_store import get_provenance
+from autology_constructor.triple_listener import TripleListener, OBJ, add_triple_listener, remove_triple_listener
+
+
+_indexes: Dict[int, Dict[str, Any]] = {}
+
+
+def _get_index(ontology, name: str, factory: Callable[[Any], Any]):
+    """获取本体的合并索引，首次访问时从本体构建"""
+    entry = _indexes.get(id(ontology))
+    if entry is None or entry["ontology"] is not ontology:
+        entry = _indexes[id(ontology)] = {"ontology": ontology}
+    if name not in entry:
+        entry[name] = factory(ontology)
+    return entry[name]
+
+
+def reset_merge_indexes(ontology):
+    """丢弃本体的所有合并索引（例如本体被整体改写后），下次访问时重建"""
+    entry = _indexes.pop(id(ontology), None) or {}
+    for index in entry.values():
+        if isinstance(index, TripleListener):
+            index.uninstall()
+
+
+def expression_key(expr) -> Hashable:
+    """类表达式的规范键，成员顺序无关，结构相同的表达式得到相同的键"""
+    if isinstance(expr, ThingClass):
+        return expr.iri
+    if isinstance(expr, (And, Or)):
+        operator = "and" if isinstance(expr, And) else "or"
+        return (operator, tuple(sorted((expression_key(c) for c in expr.Classes), key=repr)))
+    if isinstance(expr, Not):
+        return ("not", expression_key(expr.Class))
+    if isinstance(expr, Restriction):
+        return ("restriction", expr.property.iri, expr.type, expression_key(expr.value))
+    return repr(expr)
+
+
+class RestrictionIndex:
+    """属性限制去重索引
+
+    记录每个类上已有的(属性, 限定词, 值域表达式)限制和已附加的对象属性来源信息，
+    重复合并同一限制时不再追加公理和SourcedInformation。
+    """
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        self.restrictions: Set[Tuple] = set()
+        self.provenance: Set[Tuple[str, str, str, str]] = set()
+        for cls in ontology.classes():
+            for r in cls.is_a:
+                if isinstance(r, Restriction):
+                    self.restrictions.add((cls.iri, expression_key(r)))
+        # 来源信息可能在SourcedInformation个体中，也可能在SQLite旁表中
+        for record in get_provenance(ontology).all_records("object_property"):
+            self.provenance.add((record["entity_iri"], record["property"], record["content"], record["source"]))
+
+    def __contains__(self, item) -> bool:
+        cls, restriction = item
+        return (cls.iri, expression_key(restriction)) in self.restrictions
+
+    def add(self, cls: ThingClass, restriction) -> bool:
+        """记录类上的限制，限制此前不存在时返回True"""
+        key = (cls.iri, expression_key(restriction))
+        if key in self.restrictions:
+            return False
+        self.restrictions.add(key)
+        return True
+
+    def add_provenance(self, cls: ThingClass, property_name: str, content: str, source: str) -> bool:
+        """记录限制的来源信息，同一来源的相同信息此前不存在时返回True"""
+        key = (cls.iri, property_name, content, source)
+        if key in self.provenance:
+            return False
+        self.provenance.add(key)
+        return True
+
+
+class CompositeClassCache:
+    """合成定义域类缓存
+
+    以规范化的并/交表达式（运算符 + 排序后的成员）为键，映射到定义它的命名类，
+    同一复合定义域重复出现时复用已有的类，不再新建类或追加等价公理。
+    """
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        self.classes: Dict[Hashable, ThingClass] = {}
+        for cls in ontology.classes():
+            for eq in cls.equivalent_to:
+                if isinstance(eq, (And, Or)):
+                    self.classes.setdefault(expression_key(eq), cls)
+
+    def get_or_create(self, namespace, name: str, expr) -> Tuple[ThingClass, bool]:
+        """返回与expr等价的命名类，不存在时以name新建
+
+        Returns:
+            (命名类, 是否新建)
+        """
+        key = expression_key(expr)
+        cls = self.classes.get(key)
+        if cls is not None:
+            return cls, False
+        with namespace:
+            cls = types.new_class(name, (Thing,))
+            if not any(expression_key(eq) == key for eq in cls.equivalent_to):
+                cls.equivalent_to.append(expr)
+        self.classes[key] = cls
+        return cls, True
+
+
+class DataValueAccumulator(TripleListener):
+    """数据属性值累加器
+
+    每个(类, 数据属性)维护一个已有值的哈希集合（首次访问时从本体读取），新值先暂存，
+    flush时每个(类, 属性)只追加一次，owlready2只需写入真正新增的值。
+    值在flush写入成功后才记为已有；通过三元组监听发现其他途径修改了类的数据三元组时，
+    丢弃该类的集合，绕过拦截的写入则丢弃全部集合，下次访问时从本体重新读取。
+    """
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        self.values: Dict[int, Dict[str, Set]] = {}
+        self.pending: Dict[Tuple[ThingClass, str], List] = {}
+        self._pending_values: Dict[Tuple[int, str], Set] = {}
+        self._flushing = False
+        self._hooks = add_triple_listener(ontology, self)
+        self._external_seen = self._hooks.external_write_count()
+
+    def _changed(self, kind: str, row: tuple):
+        # 类上的数据属性值以value限制（匿名节点）存储，匿名节点的变更归到引用它的类
+        subject = row[0]
+        if kind == OBJ:
+            if isinstance(row[2], int) and row[2] < 0:
+                self.values.pop(subject, None)
+        elif subject < 0:
+            owners = self.ontology.world.graph.db.execute("SELECT s FROM objs WHERE o = ?", (subject,))
+            for (owner,) in owners.fetchall():
+                self.values.pop(owner, None)
+        else:
+            self.values.pop(subject, None)
+
+    def triple_added(self, kind: str, row: tuple):
+        if not self._flushing:
+            self._changed(kind, row)
+
+    def triple_removed(self, kind: str, row: tuple):
+        self._changed(kind, row)
+
+    def uninstall(self):
+        remove_triple_listener(self.ontology, self)
+
+    @staticmethod
+    def _current_values(cls: ThingClass, property_name: str) -> List:
+        current = getattr(cls, property_name, [])
+        if not isinstance(current, list):
+            current = [current] if current is not None else []
+        return current
+
+    def _known(self, cls: ThingClass, property_name: str) -> Set:
+        if not self.pending and self._hooks.external_write_count() != self._external_seen:
+            self._external_seen = self._hooks.external_write_count()
+            self.values.clear()
+        by_property = self.values.setdefault(cls.storid, {})
+        known = by_property.get(property_name)
+        if known is None:
+            known = by_property[property_name] = set(self._current_values(cls, property_name))
+        return known
+
+    def add(self, cls: ThingClass, property_name: str, value) -> bool:
+        """暂存新值，值已存在或已暂存时返回False"""
+        if value in self._known(cls, property_name):
+            return False
+        staged = self._pending_values.setdefault((cls.storid, property_name), set())
+        if value in staged:
+            return False
+        staged.add(value)
+        self.pending.setdefault((cls, property_name), []).append(value)
+        return True
+
+    def flush(self) -> int:
+        """将暂存的新值写入本体，返回写入的值数量"""
+        written = 0
+        for (cls, property_name), new_values in self.pending.items():
+            self._flushing = True
+            try:
+                current = getattr(cls, property_name, [])
+                if isinstance(current, list):
+                    current.extend(new_values)
+                else:
+                    setattr(cls, property_name, self._current_values(cls, property_name) + new_values)
+            except Exception as e:
+                # 写入失败时丢弃该类的集合，下次从本体重新读取
+                self.values.pop(cls.storid, None)
+                print(f"为类 {cls.name} 写入数据属性 {property_name} 失败: {e}")
+                continue
+            finally:
+                self._flushing = False
+            known = self.values.get(cls.storid, {}).get(property_name)
+            if known is not None:
+                known.update(new_values)
+            written += len(new_values)
+        self.pending = {}
+        self._pending_values = {}
+        return written
+
+
+class DisjointnessStore:
+    """不相交关系存储
+
+    以无序类对集合记录所有不相交关系，重复的类对只写入一次AllDisjoint公理。
+    压缩时将两两互斥的类合并为团，每个团只写一条n元AllDisjoint公理。
+    """
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        self.pairs: Set[FrozenSet[ThingClass]] = set()
+        for disjoint in ontology.disjoint_classes():
+            members = [c for c in disjoint.entities if isinstance(c, ThingClass)]
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if a is not b:
+                        self.pairs.add(frozenset((a, b)))
+
+    def __contains__(self, pair) -> bool:
+        return frozenset(pair) in self.pairs
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def add(self, class1: ThingClass, class2: ThingClass) -> bool:
+        """记录不相交类对，类对此前不存在时返回True"""
+        pair = frozenset((class1, class2))
+        if class1 is class2 or pair in self.pairs:
+            return False
+        self.pairs.add(pair)
+        return True
+
+    def groups(self) -> List[List[ThingClass]]:
+        """用尽量少的两两互斥团覆盖所有不相交类对（贪心）"""
+        neighbours: Dict[ThingClass, Set[ThingClass]] = {}
+        for pair in self.pairs:
+            a, b = tuple(pair)
+            neighbours.setdefault(a, set()).add(b)
+            neighbours.setdefault(b, set()).add(a)
+
+        def key(c):
+            return c.name
+
+        uncovered = set(self.pairs)
+        groups = []
+        for pair in sorted(self.pairs, key=lambda p: sorted(key(c) for c in p)):
+            if pair not in uncovered:
+                continue
+            clique = sorted(pair, key=key)
+            candidates = set.intersection(*(neighbours[c] for c in clique))
+            # 优先加入能覆盖更多未覆盖类对的候选类
+            for candidate in sorted(candidates, key=lambda c: (-len(neighbours[c]), key(c))):
+                if all(candidate in neighbours[c] for c in clique):
+                    clique.append(candidate)
+            for i, a in enumerate(clique):
+                for b in clique[i + 1:]:
+                    uncovered.discard(frozenset((a, b)))
+            groups.append(clique)
+        return groups
+
+    def rewrite(self) -> Dict[str, int]:
+        """用合并后的n元AllDisjoint公理改写本体的不相交部分"""
+        existing = list(self.ontology.disjoint_classes())
+        for disjoint in existing:
+            destroy_entity(disjoint)
+        groups = self.groups()
+        with self.ontology:
+            for members in groups:
+                AllDisjoint(members)
+        return {
+            "removed_axioms": len(existing),
+            "created_axioms": len(groups),
+            "pairs": len(self.pairs)
+        }
+
+
+def get_disjointness_store(ontology) -> DisjointnessStore:
+    return _get_index(ontology, "disjointness", DisjointnessStore)
+
+
+def get_restriction_index(ontology) -> RestrictionIndex:
+    return _get_index(ontology, "restrictions", RestrictionIndex)
+
+
+def get_composite_class_cache(ontology) -> CompositeClassCache:
+    return _get_index(ontology, "composite_classes", CompositeClassCache)
+
+
+def get_data_value_accumulator(ontology) -> DataValueAccumulator:
+    return _get_index(ontology, "data_values", DataValueAccumulator)
@@ -0,0 +1,128 @@
+from collections import defaultdict, deque
+from typing import Iterable, Set
+
+from owlready2 import ThingClass, Thing, PropertyClass, Restriction, And, Or, Not, OneOf
+
+from autology_constructor.ntriples import (
+    ontology_to_ntriples, parse_ntriples, format_triple,
+    is_blank, is_iri, is_builtin, iri_term
+)
+
+
+def extract_signature(seeds: Iterable, follow_individuals: bool = False) -> Set:
+    """计算种子类周围的签名闭包
+
+    沿is_a、等价类、不相交类、限制中的属性和填充类以及属性的定义域和值域传递扩展，
+    直到没有新的实体加入。
+
+    Args:
+        seeds: 种子类
+        follow_individuals: 是否将值限制/枚举中的个体纳入签名
+    """
+    signature = set()
+    queue = deque(seeds)
+
+    def visit(expr):
+        # 展开类表达式，把其中出现的命名实体放入队列
+        if isinstance(expr, ThingClass):
+            queue.append(expr)
+        elif isinstance(expr, Restriction):
+            queue.append(expr.property)
+            visit(expr.value)
+        elif isinstance(expr, (And, Or)):
+            for c in expr.Classes:
+                visit(c)
+        elif isinstance(expr, Not):
+            visit(expr.Class)
+        elif isinstance(expr, OneOf):
+            for i in expr.instances:
+                visit(i)
+        elif isinstance(expr, Thing) and follow_individuals:
+            queue.append(expr)
+
+    while queue:
+        entity = queue.popleft()
+        if entity in signature or entity is Thing:
+            continue
+        signature.add(entity)
+        if isinstance(entity, ThingClass):
+            for expr in list(entity.is_a) + list(entity.equivalent_to):
+                visit(expr)
+            for disjoint in entity.disjoints():
+                for c in disjoint.entities:
+                    visit(c)
+        elif isinstance(entity, PropertyClass):
+            # 定义域和值域中的类一并纳入，避免属性公理因引用签名外实体而被舍弃
+            for expr in list(entity.domain) + list(entity.range):
+                visit(expr)
+        elif isinstance(entity, Thing):
+            for c in entity.is_a:
+                visit(c)
+    return signature
+
+
+def extract_module(ontology, seeds: Iterable, follow_individuals: bool = False) -> bytes:
+    """抽取种子类的模块，返回可直接加载的N-Triples
+
+    保留签名内实体作主语的三元组，以及完全由签名内实体和内置词汇构成的匿名节点
+    （限制、集合表达式、AllDisjoint等）。引用签名外实体的匿名节点整体舍弃，
+    避免产生残缺的公理。
+    """
+    signature = {iri_term(e.iri) for e in extract_signature(seeds, follow_individuals)}
+    by_subject = defaultdict(list)
+    blank_parents = defaultdict(set)
+    referenced_blanks = set()
+    for triple in parse_ntriples(ontology_to_ntriples(ontology)):
+        by_subject[triple[0]].append(triple)
+        if is_blank(triple[2]):
+            referenced_blanks.add(triple[2])
+            if is_blank(triple[0]):
+                blank_parents[triple[2]].add(triple[0])
+
+    def allowed(term: str) -> bool:
+        return not is_iri(term) or is_builtin(term) or term in signature
+
+    # 引用了签名外实体的匿名节点不可用，并向上传播到包含它的匿名节点
+    rejected = set()
+    queue = deque(
+        s for s, triples in by_subject.items()
+        if is_blank(s) and not all(allowed(p) and allowed(o) for _, p, o in triples)
+    )
+    while queue:
+        blank = queue.popleft()
+        if blank in rejected:
+            continue
+        rejected.add(blank)
+        queue.extend(blank_parents[blank])
+
+    lines = []
+    emitted = set()
+
+    def emit_blank(root: str):
+        stack = [root]
+        while stack:
+            blank = stack.pop()
+            if blank in emitted:
+                continue
+            emitted.add(blank)
+            for triple in by_subject.get(blank, []):
+                lines.append(format_triple(triple))
+                if is_blank(triple[2]):
+                    stack.append(triple[2])
+
+    for subject in signature:
+        for triple in by_subject.get(subject, []):
+            s, p, o = triple
+            if not allowed(p) or not allowed(o) or o in rejected:
+                continue
+            lines.append(format_triple(triple))
+            if is_blank(o):
+                emit_blank(o)
+
+    # 以匿名节点为主语的独立公理，例如AllDisjointClasses
+    for subject in by_subject:
+        if is_blank(subject) and subject not in referenced_blanks and subject not in rejected:
+            emit_blank(subject)
+
+    return "".join(lines).encode("utf-8")
+
@@ -0,0 +1,220 @@
+import hashlib
+import io
+import os
+import re
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Tuple, Union
+from xml.sax.saxutils import escape
+
+Triple = Tuple[str, str, str]
+
+# N-Triples项：IRI（owlready2不转义IRI中的空格）、匿名节点、带数据类型或语言标签的字面量
+_TERM = r'<[^>]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:\^\^<[^>]*>|@[A-Za-z0-9-]+)?'
+_TRIPLE_LINE = re.compile(rf'^\s*({_TERM})\s*({_TERM})\s*({_TERM})\s*\.\s*$')
+
+_ATTRIBUTE = {'"': "&quot;"}
+
+BUILTIN_NAMESPACES = (
+    "<http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "<http://www.w3.org/2000/01/rdf-schema#",
+    "<http://www.w3.org/2002/07/owl#",
+    "<http://www.w3.org/2001/XMLSchema#",
+)
+
+
+def ontology_to_ntriples(ontology) -> bytes:
+    """将本体序列化为N-Triples字节串"""
+    buffer = io.BytesIO()
+    ontology.save(file=buffer, format="ntriples")
+    return buffer.getvalue()
+
+
+def file_to_ntriples(path: str) -> bytes:
+    """将本体文件转为N-Triples字节串
+
+    .nt文件直接读取；其他格式加载到独立的World中，由quadstore直接导出，
+    不会在调用方的World中创建任何实体对象。
+    """
+    if path.endswith(".nt"):
+        with open(path, "rb") as f:
+            return f.read()
+    from owlready2 import World
+
+    world = World()
+    try:
+        onto = world.get_ontology("file://" + os.path.abspath(path)).load(only_local=True)
+        return ontology_to_ntriples(onto)
+    finally:
+        world.close()
+
+
+def parse_ntriples(data: Union[bytes, str, Iterable]) -> Iterator[Triple]:
+    """逐行解析N-Triples，产出(主语, 谓语, 宾语)三元组，各项保留N-Triples原始写法
+
+    Args:
+        data: N-Triples字节串、字符串，或按行迭代的文件对象
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    lines = data.splitlines() if isinstance(data, str) else data
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _TRIPLE_LINE.match(line)
+        if match:
+            yield match.groups()
+
+
+def format_triple(triple: Triple) -> str:
+    return f"{triple[0]} {triple[1]} {triple[2]} .\n"
+
+
+def is_blank(term: str) -> bool:
+    return term.startswith("_:")
+
+
+def is_iri(term: str) -> bool:
+    return term.startswith("<")
+
+
+def is_builtin(term: str) -> bool:
+    return term.startswith(BUILTIN_NAMESPACES)
+
+
+def iri_term(iri: str) -> str:
+    return f"<{iri}>"
+
+
+_NCNAME_SUFFIX = re.compile(r'[A-Za-z_][\w.-]*$')
+
+
+def _literal_value(term: str) -> Tuple[str, str]:
+    """字面量的值和属性（rdf:datatype或xml:lang），按owlready2的N-Triples转义规则还原"""
+    value, suffix = term.rsplit('"', 1)
+    value = value[1:].encode("raw-unicode-escape").decode("unicode-escape")
+    if suffix.startswith("^^"):
+        return value, f' rdf:datatype="{escape(suffix[3:-1], _ATTRIBUTE)}"'
+    if suffix.startswith("@"):
+        return value, f' xml:lang="{suffix[1:]}"'
+    return value, ""
+
+
+def ntriples_to_rdfxml(data: Union[bytes, str, Iterable]) -> bytes:
+    """将N-Triples转为平铺的RDF/XML（每个主语一个rdf:Description）
+
+    owlready2的N-Triples解析器按空白切分，无法读取含空格的IRI（owlready2自己序列化时不转义），
+    RDF/XML中IRI位于属性值内，可以原样往返。
+    """
+    namespaces = {"http://www.w3.org/1999/02/22-rdf-syntax-ns#": "rdf"}
+    by_subject = defaultdict(list)
+    for s, p, o in parse_ntriples(data):
+        by_subject[s].append((p, o))
+
+    def node(term: str, attribute: str) -> str:
+        if is_blank(term):
+            return f'rdf:nodeID="b{term[2:]}"'
+        return f'rdf:{attribute}="{escape(term[1:-1], _ATTRIBUTE)}"'
+
+    def qname(term: str) -> str:
+        iri = term[1:-1]
+        match = _NCNAME_SUFFIX.search(iri)
+        if match is None or match.start() == 0:
+            raise ValueError(f"无法在RDF/XML中表示谓语 {iri}")
+        namespace = iri[:match.start()]
+        prefix = namespaces.setdefault(namespace, f"ns{len(namespaces)}")
+        return f"{prefix}:{match.group()}"
+
+    body = []
+    for subject, edges in by_subject.items():
+        body.append(f"<rdf:Description {node(subject, 'about')}>")
+        for p, o in edges:
+            tag = qname(p)
+            if o.startswith('"'):
+                value, attributes = _literal_value(o)
+                body.append(f"  <{tag}{attributes}>{escape(value)}</{tag}>")
+            else:
+                body.append(f"  <{tag} {node(o, 'resource')}/>")
+        body.append("</rdf:Description>")
+
+    declarations = " ".join(f'xmlns:{prefix}="{escape(ns, _ATTRIBUTE)}"' for ns, prefix in namespaces.items())
+    lines = ['<?xml version="1.0"?>', f"<rdf:RDF {declarations}>", *body, "</rdf:RDF>", ""]
+    return "\n".join(lines).encode("utf-8")
+
+
+def load_ntriples(data: bytes, world, ontology_iri: str):
+    """将N-Triples加载到指定World的本体中（经由RDF/XML，见ntriples_to_rdfxml）"""
+    return world.get_ontology(ontology_iri).load(fileobj=io.BytesIO(ntriples_to_rdfxml(data)))
+
+
+def canonicalize_blank_nodes(triples: Iterable[Triple]) -> List[Triple]:
+    """用内容哈希替换匿名节点标签
+
+    owlready2每次序列化分配的匿名节点编号都不同，按匿名节点的出边内容（递归）计算标签后，
+    同一公理在不同序列化、不同版本中得到相同的三元组。标签同时包含引用该节点的主语和谓语，
+    不同类上内容相同的限制得到不同的标签，不会在恢复时合并成同一个匿名节点。
+    """
+    triples = list(triples)
+    outgoing = defaultdict(list)
+    incoming = defaultdict(list)
+    for s, p, o in triples:
+        if is_blank(s):
+            outgoing[s].append((p, o))
+        if is_blank(o):
+            incoming[o].append((s, p))
+
+    def resolve(roots, dependencies, label):
+        # 依赖先于节点本身计算，循环引用处的依赖按原标签处理
+        labels = {}
+        for root in roots:
+            stack = [root]
+            visiting = set()
+            while stack:
+                blank = stack[-1]
+                if blank in labels:
+                    stack.pop()
+                    continue
+                visiting.add(blank)
+                pending = [d for d in dependencies(blank) if d not in labels and d not in visiting]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                labels[blank] = label(blank, labels)
+                visiting.discard(blank)
+                stack.pop()
+        return labels
+
+    def digest(parts) -> str:
+        return hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=12).hexdigest()
+
+    # 先按出边内容自底向上计算内容哈希，再自顶向下加入引用方
+    blanks = set(outgoing) | set(incoming)
+    content = resolve(
+        blanks,
+        lambda blank: [o for _, o in outgoing.get(blank, ()) if is_blank(o)],
+        lambda blank, done: digest(sorted(f"{p} {done.get(o, o)}" for p, o in outgoing.get(blank, ())))
+    )
+    labels = resolve(
+        blanks,
+        lambda blank: [s for s, _ in incoming.get(blank, ()) if is_blank(s)],
+        lambda blank, done: "_:" + digest(
+            [content[blank]] + sorted(f"{done.get(s, s)} {p}" for s, p in incoming.get(blank, ()))
+        )
+    )
+
+    return [(labels.get(s, s), p, labels.get(o, o)) for s, p, o in triples]
+
+
+def triple_hash(triple: Triple) -> int:
+    """三元组的64位哈希"""
+    return int.from_bytes(hashlib.blake2b(format_triple(triple).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def fingerprint_triples(triples: Iterable[Triple]) -> str:
+    """与顺序无关的三元组集合指纹（各三元组64位哈希之和）"""
+    total = 0
+    for triple in set(canonicalize_blank_nodes(triples)):
+        total = (total + triple_hash(triple)) & 0xFFFFFFFFFFFFFFFF
+    return f"{total:016x}"
@@ -0,0 +1,161 @@
+from typing import Dict, Hashable, List, Set
+
+from owlready2 import Thing, ThingClass, And, Or, Not, Restriction, destroy_entity
+
+from autology_constructor.change_feed import emit_change, ONTOLOGY_REWRITTEN
+from autology_constructor.merge_indexes import expression_key, reset_merge_indexes, get_disjointness_store
+from autology_constructor.hierarchy_closure import discard_hierarchy_closure
+from autology_constructor.ontology_journal import get_journal
+from autology_constructor.provenance_store import get_ontology_provenance_store
+
+SYNTHETIC_CLASS_PREFIXES = ("intersection_of_", "union_of_")
+
+
+def _information_key(info) -> Hashable:
+    return (
+        tuple(info.type), tuple(info.content), tuple(info.source),
+        tuple(info.file_path), tuple(info.property)
+    )
+
+
+def _referenced_classes(expr, found: Set[str]):
+    """收集表达式中引用的所有命名类"""
+    stack = [expr]
+    while stack:
+        expr = stack.pop()
+        if isinstance(expr, ThingClass):
+            found.add(expr.iri)
+        elif isinstance(expr, (And, Or)):
+            stack.extend(expr.Classes)
+        elif isinstance(expr, Not):
+            stack.append(expr.Class)
+        elif isinstance(expr, Restriction):
+            stack.append(expr.value)
+
+
+def _merge_information(ontology, meta) -> Dict[str, int]:
+    """合并内容相同的SourcedInformation，并删除不再被引用的实例"""
+    if getattr(meta, "SourcedInformation", None) is None:
+        return {"deduplicated_information_links": 0, "removed_information": 0}
+    canonical = {}
+    for info in meta.SourcedInformation.instances():
+        canonical.setdefault(_information_key(info), info)
+
+    merged = 0
+    referenced = set()
+    for entity in list(ontology.classes()) + list(ontology.individuals()):
+        infos = getattr(entity, "has_information", None)
+        if not infos:
+            continue
+        new_infos = []
+        for info in infos:
+            target = canonical.get(_information_key(info), info)
+            if target not in new_infos:
+                new_infos.append(target)
+        if len(new_infos) != len(infos) or any(a is not b for a, b in zip(new_infos, infos)):
+            merged += len(infos) - len(new_infos)
+            entity.has_information = new_infos
+        referenced.update(new_infos)
+
+    orphans = [info for info in meta.SourcedInformation.instances() if info not in referenced]
+    for info in orphans:
+        destroy_entity(info)
+    return {"deduplicated_information_links": merged, "removed_information": len(orphans)}
+
+
+def _deduplicate_axioms(ontology) -> Dict[str, int]:
+    """删除重复的限制/等价公理，以及已有其他父类时多余的Thing父类"""
+    removed_axioms = 0
+    removed_thing = 0
+    for cls in ontology.classes():
+        for axioms in (cls.is_a, cls.equivalent_to):
+            seen = set()
+            duplicates = []
+            for i, axiom in enumerate(axioms):
+                key = expression_key(axiom)
+                if key in seen:
+                    duplicates.append(i)
+                seen.add(key)
+            for i in reversed(duplicates):
+                del axioms[i]
+            removed_axioms += len(duplicates)
+        if Thing in cls.is_a and any(isinstance(p, ThingClass) and p is not Thing for p in cls.is_a):
+            cls.is_a.remove(Thing)
+            removed_thing += 1
+    return {"removed_duplicate_axioms": removed_axioms, "removed_thing_parents": removed_thing}
+
+
+def _remove_unused_synthetic_classes(ontology) -> List[str]:
+    """删除未被使用的合成定义域类（intersection_of_*/union_of_*）
+
+    只删除没有子类、实例、限制，且未被其他类的公理引用的类。
+    """
+    referenced = set()
+    candidates = []
+    for cls in ontology.classes():
+        if cls.name.startswith(SYNTHETIC_CLASS_PREFIXES):
+            candidates.append(cls)
+        for axiom in cls.is_a:
+            _referenced_classes(axiom, referenced)
+        for axiom in cls.equivalent_to:
+            # 合成类自身的等价定义不算引用
+            if not cls.name.startswith(SYNTHETIC_CLASS_PREFIXES):
+                _referenced_classes(axiom, referenced)
+
+    removed = []
+    for cls in candidates:
+        if cls.iri in referenced:
+            continue
+        if any(isinstance(axiom, Restriction) for axiom in cls.is_a):
+            continue
+        if list(cls.subclasses()) or list(cls.instances()):
+            continue
+        removed.append(cls.name)
+        destroy_entity(cls)
+    return removed
+
+
+def compact_ontology(ontology=None, meta=None, save: bool = True) -> Dict[str, int]:
+    """压缩本体：规范化改写并清除多次合并后积累的冗余内容
+
+    可在批量合并之间运行，返回各项清除数量。
+    """
+    if ontology is None or meta is None:
+        from config.settings import ONTOLOGY_CONFIG
+        ontology = ontology or ONTOLOGY_CONFIG["ontology"]
+        meta = meta or ONTOLOGY_CONFIG["meta"]
+
+    report = {}
+    store = get_ontology_provenance_store(ontology)
+    if store is None:
+        report.update(_merge_information(ontology, meta))
+    report.update(_deduplicate_axioms(ontology))
+    report["removed_synthetic_classes"] = len(_remove_unused_synthetic_classes(ontology))
+    if store is not None:
+        # 旁表中的记录已由唯一约束去重，只需删除实体已被删除的记录
+        entities = {e.iri for e in list(ontology.classes()) + list(ontology.individuals())}
+        report["removed_information"] = store.remove_orphans(entities)
+
+    # 合并索引和层次闭包基于改写前的本体，重建后再合并不相交公理
+    reset_merge_indexes(ontology)
+    discard_hierarchy_closure(ontology)
+    disjointness = get_disjointness_store(ontology).rewrite()
+    report["removed_disjoint_axioms"] = disjointness["removed_axioms"]
+    report["created_disjoint_axioms"] = disjointness["created_axioms"]
+    # 通知OntologyTools预计算索引、全文索引和分析缓存等订阅者
+    emit_change(ontology, ONTOLOGY_REWRITTEN, ontology.name, reason="compaction", **report)
+
+    if save:
+        # 日志模式下写入新的完整快照并清空日志
+        journal = get_journal(ontology)
+        if journal is not None:
+            journal.snapshot()
+        else:
+            ontology.save()
+    return report
+
+
+if __name__ == "__main__":
+    report = compact_ontology()
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,261 @@
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from autology_constructor.ntriples import (
+    parse_ntriples, canonicalize_blank_nodes, file_to_ntriples, is_blank, is_iri
+)
+
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL = "http://www.w3.org/2002/07/owl#"
+
+RDF_TYPE = f"<{RDF}type>"
+RDF_FIRST = f"<{RDF}first>"
+RDF_REST = f"<{RDF}rest>"
+RDF_NIL = f"<{RDF}nil>"
+SUBCLASS_OF = f"<{RDFS}subClassOf>"
+EQUIVALENT_CLASS = f"<{OWL}equivalentClass>"
+OWL_CLASS = f"<{OWL}Class>"
+ON_PROPERTY = f"<{OWL}onProperty>"
+INTERSECTION_OF = f"<{OWL}intersectionOf>"
+UNION_OF = f"<{OWL}unionOf>"
+COMPLEMENT_OF = f"<{OWL}complementOf>"
+HAS_VALUE = f"<{OWL}hasValue>"
+MEMBERS = f"<{OWL}members>"
+DISJOINT_WITH = f"<{OWL}disjointWith>"
+DISJOINT_AXIOMS = {f"<{OWL}AllDisjointClasses>", f"<{OWL}AllDisjointProperties>"}
+QUANTIFIERS = {
+    f"<{OWL}someValuesFrom>": "some",
+    f"<{OWL}allValuesFrom>": "only",
+    HAS_VALUE: "value",
+}
+
+Triple = Tuple[int, int, int]
+
+
+def local_name(term: str) -> str:
+    """IRI取最后一段作为显示名，其他项原样返回"""
+    if is_iri(term):
+        iri = term[1:-1]
+        return iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1] or iri
+    return term
+
+
+class TermTable:
+    """项驻留表：两个版本共享同一编号，三元组以整数元组比较"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+
+    def intern(self, term: str) -> int:
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def get(self, term: str) -> Optional[int]:
+        return self.ids.get(term)
+
+
+class TripleGraph:
+    """以驻留编号表示的三元组集合，附带匿名节点的出边和入边索引"""
+
+    def __init__(self, triples: Set[Triple], terms: TermTable):
+        self.triples = triples
+        self.terms = terms
+        self.outgoing: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        self.incoming: Dict[int, Tuple[int, int]] = {}
+        for s, p, o in triples:
+            if is_blank(terms.terms[s]):
+                self.outgoing[s].append((p, o))
+            if is_blank(terms.terms[o]):
+                self.incoming[o] = (s, p)
+
+    def owner(self, term_id: int) -> Tuple[int, Optional[Triple]]:
+        """匿名节点所属的命名实体，以及连接该实体与表达式根节点的三元组"""
+        edge = None
+        seen = set()
+        while is_blank(self.terms.terms[term_id]) and term_id in self.incoming and term_id not in seen:
+            seen.add(term_id)
+            s, p = self.incoming[term_id]
+            edge = (s, p, term_id)
+            term_id = s
+        return term_id, edge
+
+    def _list(self, node: int) -> List[int]:
+        items = []
+        nil = self.terms.get(RDF_NIL)
+        first = self.terms.get(RDF_FIRST)
+        rest = self.terms.get(RDF_REST)
+        seen = set()
+        while node != nil and node not in seen:
+            seen.add(node)
+            edges = dict(self.outgoing.get(node, ()))
+            if first not in edges:
+                break
+            items.append(edges[first])
+            node = edges.get(rest, nil)
+        return items
+
+    def describe(self, term_id: int, depth: int = 0) -> str:
+        """将类表达式还原为可读形式，如 has_part some (a and b)"""
+        term = self.terms.terms[term_id]
+        if not is_blank(term) or depth > 10:
+            return local_name(term)
+        edges = {self.terms.terms[p]: o for p, o in self.outgoing.get(term_id, ())}
+        if ON_PROPERTY in edges:
+            prop = local_name(self.terms.terms[edges[ON_PROPERTY]])
+            for predicate, quantifier in QUANTIFIERS.items():
+                if predicate in edges:
+                    return f"{prop} {quantifier} {self.describe(edges[predicate], depth + 1)}"
+            return f"{prop} restriction"
+        for predicate, operator in ((INTERSECTION_OF, " and "), (UNION_OF, " or ")):
+            if predicate in edges:
+                members = [self.describe(m, depth + 1) for m in self._list(edges[predicate])]
+                return "(" + operator.join(members) + ")"
+        if COMPLEMENT_OF in edges:
+            return f"not {self.describe(edges[COMPLEMENT_OF], depth + 1)}"
+        return term
+
+
+def load_triples(path: str, terms: TermTable) -> TripleGraph:
+    """读取本体文件为驻留编号三元组集合（匿名节点按内容规范化，两版本间可比较）"""
+    triples = set()
+    for s, p, o in canonicalize_blank_nodes(parse_ntriples(file_to_ntriples(path))):
+        triples.add((terms.intern(s), terms.intern(p), terms.intern(o)))
+    return TripleGraph(triples, terms)
+
+
+def _rootless_axiom(graph: TripleGraph, root: int, triple: Triple,
+                    changed: Set[Triple]) -> List[Tuple[int, str, str]]:
+    """没有主语实体的n元公理（如AllDisjointClasses），在每个命名成员下各报告一次"""
+    terms = graph.terms.terms
+    edges = {terms[p]: o for p, o in graph.outgoing.get(root, ())}
+    axiom_type = terms[edges[RDF_TYPE]] if RDF_TYPE in edges else None
+    type_triple = (root, graph.terms.get(RDF_TYPE), edges.get(RDF_TYPE))
+    # 公理整体增删时只由其类型三元组报告
+    if type_triple in changed and triple != type_triple:
+        return []
+
+    if MEMBERS in edges:
+        members = graph._list(edges[MEMBERS])
+    else:
+        members = [o for p, o in graph.outgoing.get(root, ()) if terms[p] != RDF_TYPE]
+    names = [m for m in members if not is_blank(terms[m])]
+    category = "disjoint" if axiom_type in DISJOINT_AXIOMS else "axiom"
+    description = f"{local_name(axiom_type or 'axiom')}({', '.join(graph.describe(m) for m in members)})"
+    if triple != type_triple:
+        description += f": {local_name(terms[triple[1]])} {graph.describe(triple[2])}"
+    return [(name, category, description) for name in names]
+
+
+def _categorize(graph: TripleGraph, triple: Triple, changed: Set[Triple],
+                provenance_owner: Dict[int, int]) -> List[Tuple[int, str, str]]:
+    """[(所属实体, 类别, 描述)]；属于某个整体增删的表达式内部的三元组返回空列表"""
+    terms = graph.terms.terms
+    s, p, o = triple
+    subject, predicate, obj = terms[s], terms[p], terms[o]
+
+    if is_blank(subject):
+        owner, edge = graph.owner(s)
+        if is_blank(terms[owner]):
+            return _rootless_axiom(graph, owner, triple, changed)
+        # 表达式随其根节点一起增删时，只报告根节点那一条
+        if edge is None or edge in changed:
+            return []
+        return [(owner, "expression", f"{graph.describe(edge[2])}: {local_name(predicate)} {graph.describe(o)}")]
+
+    if s in provenance_owner:
+        return [(provenance_owner[s], "provenance", f"{local_name(subject)}.{local_name(predicate)} = {obj}")]
+    if predicate == RDF_TYPE and obj == OWL_CLASS:
+        return [(s, "class", local_name(subject))]
+    if predicate == SUBCLASS_OF and not is_blank(obj):
+        return [(s, "parent", local_name(obj))]
+    if predicate == DISJOINT_WITH and not is_blank(obj):
+        return [(s, "disjoint", local_name(obj)), (o, "disjoint", local_name(subject))]
+    if predicate in (SUBCLASS_OF, EQUIVALENT_CLASS) and is_blank(obj):
+        description = graph.describe(o)
+        edges = {terms[q]: v for q, v in graph.outgoing.get(o, ())}
+        if HAS_VALUE in edges and edges[HAS_VALUE] in provenance_owner:
+            return [(s, "provenance", description)]
+        category = "restriction" if predicate == SUBCLASS_OF else "equivalence"
+        return [(s, category, description)]
+    return [(s, "other", f"{local_name(predicate)} {local_name(obj)}")]
+
+
+def _provenance_owners(graph: TripleGraph) -> Dict[int, int]:
+    """SourcedInformation个体 -> 引用它的实体"""
+    owners = {}
+    terms = graph.terms.terms
+    for s, p, o in graph.triples:
+        if local_name(terms[p]) == "has_information":
+            owners[o] = graph.owner(s)[0]
+    for s, p, o in graph.triples:
+        if terms[p] == HAS_VALUE and o not in owners:
+            owner, _ = graph.owner(s)
+            edges = {terms[q]: v for q, v in graph.outgoing.get(s, ())}
+            if ON_PROPERTY in edges and local_name(terms[edges[ON_PROPERTY]]) == "has_information":
+                owners[o] = owner
+    return owners
+
+
+def iter_diff(old_path: str, new_path: str) -> Iterator[Dict]:
+    """按实体产出两个本体版本之间的差异
+
+    两个版本先整体载入并求差集（按实体归组需要完整的差异），之后按实体名顺序逐个产出，
+    调用方可以边产出边输出，无需再保存整个结果。
+
+    Yields:
+        {"entity": 实体名, "changes": [{"op": "+"/"-", "category": 类别, "description": 描述}]}
+        类别为class、parent、restriction、equivalence、expression、disjoint、axiom、provenance或other
+    """
+    terms = TermTable()
+    old = load_triples(old_path, terms)
+    new = load_triples(new_path, terms)
+    removed = old.triples - new.triples
+    added = new.triples - old.triples
+
+    by_entity: Dict[int, List[Dict]] = defaultdict(list)
+    for op, graph, changed in (("-", old, removed), ("+", new, added)):
+        provenance_owner = _provenance_owners(graph)
+        for triple in changed:
+            for entity, category, description in _categorize(graph, triple, changed, provenance_owner):
+                by_entity[entity].append({"op": op, "category": category, "description": description})
+
+    for entity in sorted(by_entity, key=lambda e: terms.terms[e]):
+        changes = sorted(by_entity[entity], key=lambda c: (c["category"], c["op"], c["description"]))
+        yield {"entity": local_name(terms.terms[entity]), "changes": changes}
+
+
+def summarize(diff: Iterator[Dict]) -> Dict[str, Dict[str, int]]:
+    """各类别新增/删除数量"""
+    summary = defaultdict(lambda: {"+": 0, "-": 0})
+    for entry in diff:
+        for change in entry["changes"]:
+            summary[change["category"]][change["op"]] += 1
+    return dict(summary)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="比较两个本体版本")
+    parser.add_argument("old", help="旧版本（.owl或.nt）")
+    parser.add_argument("new", help="新版本（.owl或.nt）")
+    parser.add_argument("--category", action="append", help="只显示指定类别，可重复")
+    parser.add_argument("--json", action="store_true", help="每个实体输出一行JSON")
+    args = parser.parse_args()
+
+    for entry in iter_diff(args.old, args.new):
+        changes = [c for c in entry["changes"] if not args.category or c["category"] in args.category]
+        if not changes:
+            continue
+        if args.json:
+            print(json.dumps({"entity": entry["entity"], "changes": changes}, ensure_ascii=False))
+            continue
+        print(entry["entity"])
+        for change in changes:
+            print(f"  {change['op']} [{change['category']}] {change['description']}")
@@ -0,0 +1,106 @@
+import hashlib
+from typing import Dict
+
+from autology_constructor.triple_listener import TripleListener, OBJ, DATA, add_triple_listener, remove_triple_listener
+
+MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def _obj_hash(s: int, p: int, o: int) -> int:
+    return int.from_bytes(hashlib.blake2b(f"o {s} {p} {o}".encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _data_hash(s: int, p: int, o, d) -> int:
+    return int.from_bytes(hashlib.blake2b(f"d {s} {p} {o!r} {d!r}".encode("utf-8"), digest_size=8).digest(), "little")
+
+
+_HASHERS = {OBJ: _obj_hash, DATA: _data_hash}
+
+
+class IncrementalFingerprint(TripleListener):
+    """本体的增量内容指纹
+
+    指纹为本体中所有(去重)三元组64位哈希之和，与顺序无关。通过三元组监听拦截本体的增删，
+    每次增删只更新受影响三元组的哈希，读取指纹无需序列化或重新哈希整个本体。
+    三元组以quadstore中的storid哈希，因此指纹只在同一World内可比较；跨进程比较请使用
+    ntriples.fingerprint_triples。绕过本体写入方法的修改（如destroy_entity）由三元组监听的
+    行变更计数发现，下次读取时重新计算；未发生这类修改时读取指纹为O(1)。
+    """
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        self.total = 0
+        self.count = 0
+        self._hooks = add_triple_listener(ontology, self)
+        self.rebuild()
+
+    def _execute(self, sql: str, params=()):
+        return self.ontology.world.graph.db.execute(sql, params)
+
+    def _context(self) -> int:
+        return self.ontology.graph.c
+
+    def triple_added(self, kind: str, row: tuple):
+        self.total = (self.total + _HASHERS[kind](*row)) & MASK
+        self.count += 1
+
+    def triple_removed(self, kind: str, row: tuple):
+        self.total = (self.total - _HASHERS[kind](*row)) & MASK
+        self.count -= 1
+
+    def uninstall(self):
+        """停止跟踪本体的增删"""
+        remove_triple_listener(self.ontology, self)
+
+    def _row_count(self) -> int:
+        c = self._context()
+        objs = self._execute("SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM objs WHERE c = ?)", (c,)).fetchone()[0]
+        datas = self._execute("SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o, d FROM datas WHERE c = ?)", (c,)).fetchone()[0]
+        return objs + datas
+
+    def rebuild(self) -> str:
+        """从quadstore完整重新计算指纹"""
+        c = self._context()
+        total = 0
+        count = 0
+        for row in self._execute("SELECT DISTINCT s, p, o FROM objs WHERE c = ?", (c,)):
+            total += _obj_hash(*row)
+            count += 1
+        for row in self._execute("SELECT DISTINCT s, p, o, d FROM datas WHERE c = ?", (c,)):
+            total += _data_hash(*row)
+            count += 1
+        self.total = total & MASK
+        self.count = count
+        self._external_seen = self._hooks.external_write_count()
+        return self.hexdigest()
+
+    def hexdigest(self) -> str:
+        return f"{self.total:016x}"
+
+    def value(self, verify: bool = False) -> str:
+        """当前指纹，发现绕过拦截的写入时重新计算
+
+        Args:
+            verify: 是否额外用三元组计数校验增量状态（需扫描quadstore，用于调试）
+        """
+        stale = not self._hooks.complete or self._hooks.external_write_count() != self._external_seen
+        if stale or (verify and self._row_count() != self.count):
+            return self.rebuild()
+        return self.hexdigest()
+
+
+_fingerprints: Dict[int, IncrementalFingerprint] = {}
+
+
+def get_incremental_fingerprint(ontology) -> IncrementalFingerprint:
+    """获取本体的增量指纹，首次访问时安装并计算"""
+    fingerprint = _fingerprints.get(id(ontology))
+    if fingerprint is None or fingerprint.ontology is not ontology:
+        fingerprint = _fingerprints[id(ontology)] = IncrementalFingerprint(ontology)
+    return fingerprint
+
+
+def ontology_fingerprint(ontology, verify: bool = False) -> str:
+    """本体当前内容的指纹，可作为缓存键"""
+    return get_incremental_fingerprint(ontology).value(verify)
+
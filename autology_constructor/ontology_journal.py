@@ -0,0 +1,290 @@
+import io
+import json
+import os
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+from autology_constructor.triple_listener import TripleListener, OBJ, add_triple_listener, remove_triple_listener
+
+COMMIT_MARKER = "# commit"
+
+
+class OntologyJournal(TripleListener):
+    """追加写入的三元组日志
+
+    开启后不再在每次合并后重写整个本体文件：合并提交时只把本次增删的三元组追加到日志文件
+    （每行一个JSON数组：["+"/"-", 主语, 谓语, 宾语(, 数据类型)]，以提交标记行结束），
+    启动时在快照之上重放日志中完整提交的部分，写到一半的提交被丢弃。
+    日志超过阈值时在后台线程写入新的完整快照并截断日志，期间的提交照常追加，不会被阻塞。
+
+    匿名节点的storid在重新加载后会改变，日志只能引用上次快照之后在日志中创建的匿名节点；
+    某次提交删除或引用了快照中已有的匿名节点时，该次提交改为直接写完整快照。
+    快照和日志均先写临时文件再原子替换；若恰好在替换快照与截断日志之间崩溃，
+    重放可能产生重复公理，可由ontology_compaction清除。
+    """
+
+    def __init__(self, ontology, ontology_file: str, journal_file: Optional[str] = None,
+                 compact_threshold: int = 5000):
+        self.ontology = ontology
+        self.ontology_file = ontology_file
+        self.journal_file = journal_file or ontology_file + ".journal"
+        self.compact_threshold = compact_threshold
+        self.session = uuid.uuid4().hex[:8]
+        self._pending: List[list] = []
+        self._labels: Dict[int, str] = {}
+        self._needs_snapshot = False
+        self._replaying = False
+        self._entries = 0
+        self._commits = 0
+        self._lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self.replay()
+        add_triple_listener(ontology, self)
+
+    # 项的编码
+
+    def _subject_rows(self, storid: int) -> int:
+        db = self.ontology.world.graph.db
+        return (db.execute("SELECT COUNT(*) FROM objs WHERE s = ?", (storid,)).fetchone()[0]
+                + db.execute("SELECT COUNT(*) FROM datas WHERE s = ?", (storid,)).fetchone()[0])
+
+    def _encode(self, storid: int, added_as_subject: Optional[bool] = None) -> Optional[str]:
+        """将storid编码为日志中的项，无法在重放时还原的匿名节点返回None
+
+        Args:
+            added_as_subject: 新增三元组时该项是否为主语（None表示不是新增）
+        """
+        if storid > 0:
+            return f"<{self.ontology.world._unabbreviate(storid)}>"
+        label = self._labels.get(storid)
+        if label is None and added_as_subject is not None:
+            # 除刚写入的这一行外没有以它为主语的三元组，说明是本次新建的匿名节点
+            if self._subject_rows(storid) <= (1 if added_as_subject else 0):
+                label = self._labels[storid] = f"_:{self.session}x{-storid}"
+        return label
+
+    def _encode_datatype(self, d):
+        if isinstance(d, int) and d > 0:
+            return f"<{self.ontology.world._unabbreviate(d)}>"
+        return d
+
+    def _decode(self, term: str, blanks: Dict[str, int]) -> int:
+        if term.startswith("_:"):
+            storid = blanks.get(term)
+            if storid is None:
+                storid = blanks[term] = self.ontology.world.new_blank_node()
+                self._labels[storid] = term
+            return storid
+        return self.ontology.world._abbreviate(term[1:-1])
+
+    def _decode_datatype(self, d):
+        if isinstance(d, str) and d.startswith("<"):
+            return self.ontology.world._abbreviate(d[1:-1])
+        return d
+
+    # 监听本体增删
+
+    def _record(self, op: str, kind: str, row: tuple):
+        if self._replaying:
+            return
+        added = op == "+"
+        subject = self._encode(row[0], True if added else None)
+        predicate = self._encode(row[1])
+        if kind == OBJ:
+            entry = [op, subject, predicate, self._encode(row[2], False if added else None)]
+        else:
+            entry = [op, subject, predicate, row[2], self._encode_datatype(row[3])]
+        if None in entry[1:3] or (kind == OBJ and entry[3] is None):
+            self._needs_snapshot = True
+        self._pending.append(entry)
+
+    def triple_added(self, kind: str, row: tuple):
+        self._record("+", kind, row)
+
+    def triple_removed(self, kind: str, row: tuple):
+        self._record("-", kind, row)
+
+    # 提交、重放与压缩
+
+    def commit(self):
+        """提交自上次提交以来的增删：追加到日志并落盘，必要时改为写完整快照
+
+        后台压缩进行中时照常追加，压缩线程截断日志时保留其开始之后追加的内容。
+        """
+        if self._needs_snapshot:
+            self.snapshot()
+            return
+        if not self._pending:
+            return
+        self._commits += 1
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in self._pending]
+        lines.append(f"{COMMIT_MARKER} {self._commits}\n")
+        with self._lock:
+            with open(self.journal_file, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        self._entries += len(self._pending)
+        self._pending = []
+        if self._entries >= self.compact_threshold and not self.compacting:
+            self.compact(background=True)
+
+    def replay(self) -> int:
+        """在已加载的快照上重放日志中完整提交的部分，返回重放的三元组数"""
+        if not os.path.exists(self.journal_file):
+            return 0
+        committed = []
+        batch = []
+        with open(self.journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(COMMIT_MARKER):
+                    committed.extend(batch)
+                    batch = []
+                    self._commits += 1
+                elif line.strip():
+                    try:
+                        batch.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # 崩溃时写到一半的行，之后的内容都不完整
+                        break
+        if batch:
+            print(f"丢弃日志中未完成的提交（{len(batch)}个三元组）")
+
+        blanks = {}
+        onto = self.ontology
+        self._replaying = True
+        try:
+            for entry in committed:
+                op, s, p, o = entry[0], entry[1], entry[2], entry[3]
+                s = self._decode(s, blanks)
+                p = self._decode(p, blanks)
+                if len(entry) == 4:
+                    o = self._decode(o, blanks)
+                    if op == "+":
+                        onto._add_obj_triple_spo(s, p, o)
+                    else:
+                        onto._del_obj_triple_spo(s, p, o)
+                else:
+                    d = self._decode_datatype(entry[4])
+                    if op == "+":
+                        onto._add_data_triple_spod(s, p, o, d)
+                    else:
+                        onto._del_data_triple_spod(s, p, o, d)
+        finally:
+            self._replaying = False
+        self._entries = len(committed)
+        return len(committed)
+
+    def _serialize(self) -> bytes:
+        """序列化完整快照
+
+        快照中的匿名节点在重新加载后storid会改变，日志标签只对之后新建的匿名节点有效，
+        因此同时清空标签；之后引用这些匿名节点的提交会改为写完整快照。
+        """
+        buffer = io.BytesIO()
+        self.ontology.save(file=buffer)
+        self._labels = {}
+        return buffer.getvalue()
+
+    def _write_snapshot(self, data: bytes, journal_offset: int):
+        """原子地写入快照，并从日志中删除已包含在快照中的部分"""
+        tmp_path = self.ontology_file + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.ontology_file)
+        with self._lock:
+            remaining = ""
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, "r", encoding="utf-8") as f:
+                    f.seek(journal_offset)
+                    remaining = f.read()
+            tmp_journal = self.journal_file + ".tmp"
+            with open(tmp_journal, "w", encoding="utf-8") as f:
+                f.write(remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_journal, self.journal_file)
+
+    def _journal_size(self) -> int:
+        return os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+
+    def snapshot(self):
+        """立即写入完整快照并清空日志"""
+        self.wait()
+        with self._lock:
+            offset = self._journal_size()
+        self._write_snapshot(self._serialize(), offset)
+        self._pending = []
+        self._needs_snapshot = False
+        self._entries = 0
+
+    def compact(self, background: bool = True):
+        """把日志压缩为新的完整快照
+
+        序列化在当前线程进行（owlready2不支持并发访问），文件写入和日志截断在后台线程进行，
+        期间提交的日志内容会被保留。已有后台压缩在进行时不再启动新的压缩。
+        """
+        if self._pending or self._needs_snapshot:
+            self.commit()
+            if not self._entries:
+                # 提交时已写入快照或已启动压缩
+                return
+        if background and self.compacting:
+            return
+        self.wait()
+        with self._lock:
+            offset = self._journal_size()
+        data = self._serialize()
+        self._entries = 0
+        if background:
+            self._compaction = threading.Thread(target=self._write_snapshot, args=(data, offset), daemon=True)
+            self._compaction.start()
+        else:
+            self._write_snapshot(data, offset)
+
+    @property
+    def compacting(self) -> bool:
+        """是否有后台压缩正在进行"""
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def wait(self):
+        """等待后台压缩完成"""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+
+    def close(self):
+        self.commit()
+        self.wait()
+        remove_triple_listener(self.ontology, self)
+
+
+_journals: Dict[int, OntologyJournal] = {}
+
+
+def open_journal(ontology, ontology_file: str, **kwargs) -> OntologyJournal:
+    """为本体开启日志模式，重放已有日志"""
+    journal = _journals.get(id(ontology))
+    if journal is None or journal.ontology is not ontology:
+        journal = _journals[id(ontology)] = OntologyJournal(ontology, ontology_file, **kwargs)
+    return journal
+
+
+def get_journal(ontology) -> Optional[OntologyJournal]:
+    """本体的日志，未开启日志模式时返回None"""
+    journal = _journals.get(id(ontology))
+    if journal is not None and journal.ontology is ontology:
+        return journal
+    return None
+
+
+def commit_ontology(ontology):
+    """提交本体修改：日志模式下追加日志，否则整体保存"""
+    journal = get_journal(ontology)
+    if journal is not None:
+        journal.commit()
+    else:
+        ontology.save()
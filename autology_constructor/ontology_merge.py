@@ -2,6 +2,14 @@ from owlready2 import *
 from typing import List
 from autology_constructor import base_data_structures 
 from autology_constructor.utils import flatten_dict
+from autology_constructor.consistency_checker import check_structural_consistency
+from autology_constructor.provenance_store import get_ontology_provenance_store, get_provenance
+from autology_constructor.provenance_search import get_ontology_provenance_search_index
+from autology_constructor.change_feed import (
+    emit_change, CLASS_ADDED, PARENT_ADDED, RESTRICTION_ADDED, PROVENANCE_ADDED, DISJOINTNESS_ADDED, PROPERTY_ADDED
+)
+from autology_constructor.ontology_journal import commit_ontology
+from autology_constructor.merge_indexes import get_disjointness_store, get_restriction_index, get_composite_class_cache, get_data_value_accumulator
 
 from config.settings import ONTOLOGY_CONFIG
 
@@ -28,23 +36,31 @@ def merge_ontology(
         # 写入实体(类)
         if ontology_entities and ontology_entities.entities:
             _merge_entities(ontology_entities.entities, source, file_path)
-            onto.save()
+            commit_ontology(onto)
         # 写入层级关系
         if ontology_elements and ontology_elements.hierarchy:
             _merge_hierarchy(ontology_elements.hierarchy, source, file_path )
-            onto.save()
+            commit_ontology(onto)
         # 写入不相交关系
         if ontology_elements and ontology_elements.disjointness:
             _merge_disjointness(ontology_elements.disjointness)
-            onto.save()
+            commit_ontology(onto)
         # 写入数据属性
         if ontology_data_properties and ontology_data_properties.data_properties:
             _merge_data_properties(ontology_data_properties.data_properties, source, file_path)
-            onto.save() 
+            commit_ontology(onto)
         # 写入对象属性
         if ontology_object_properties and ontology_object_properties.object_properties:
             _merge_object_properties(ontology_object_properties.object_properties, source, file_path)
-            onto.save()
+            commit_ontology(onto)
+        
+        # 轻量级结构一致性检查，完整的Pellet推理只需定期运行
+        report = check_structural_consistency(onto)
+        if report["cycles"]:
+            print(f"层次结构中存在环: {report['cycles']}")
+        if report["unsatisfiable_classes"]:
+            print(f"检测到不可满足的类: {report['unsatisfiable_classes']}")
+        return report
             
     except Exception as e:
         print(f"本体合并失败: {e}")
@@ -57,28 +73,67 @@ def _class_exists(class_name: str) -> bool:
     except Exception:
         return False
 
+def _property_exists(namespace: str, property_name: str, properties) -> bool:
+    """检查数据属性或对象属性是否存在"""
+    try:
+        return ONTOLOGY_CONFIG[namespace][property_name] in properties
+    except Exception:
+        return False
+
+def _record_new_class(new_class):
+    """发出类新增事件（已构建的层次闭包订阅该事件并增量更新）"""
+    parents = [p.name for p in new_class.is_a if isinstance(p, ThingClass)]
+    emit_change(ONTOLOGY_CONFIG["ontology"], CLASS_ADDED, new_class.name, parents=parents)
+
+def _record_new_parent(subclass, superclass):
+    """发出父类新增事件（已构建的层次闭包订阅该事件并增量更新）"""
+    emit_change(ONTOLOGY_CONFIG["ontology"], PARENT_ADDED, subclass.name, parent=superclass.name)
+
+def _record_new_restriction(cls, restriction, property_name: str):
+    """发出限制新增事件"""
+    emit_change(ONTOLOGY_CONFIG["ontology"], RESTRICTION_ADDED, cls.name, property=property_name, restriction=str(restriction))
+
+def _sourced_information_fields(type: str, superclass: List[str] = None, property = None, information: str = None) -> dict:
+    """来源信息的type/content/property字段"""
+    fields = {"type": type, "content": information, "property": None}
+    if type == "hierarchy":
+        fields["content"] = f"(Superclass: {', '.join(superclass)}): {information}"
+    elif type in ("data_property", "object_property"):
+        fields["property"] = property
+    return fields
+
 def _instantiate_sourced_information(source: str, type: str, file_path: str, superclass: List[str] = None, property = None, information: str = None):
     """创建SourcedInformation实例"""
     meta = ONTOLOGY_CONFIG["meta"]
+    fields = _sourced_information_fields(type, superclass, property, information)
     info_instance = meta.SourcedInformation()
     info_instance.source = [source]
     info_instance.file_path = [file_path]
-    if type == "entity":
-        info_instance.content = [information]
-        info_instance.type = ["entity"]
-    elif type == "hierarchy":
-        info_instance.content = [f"(Superclass: {', '.join(superclass)}): {information}"]
-        info_instance.type = ["hierarchy"]
-    elif type == "data_property":
-        info_instance.content = [information]
-        info_instance.type = ["data_property"]
-        info_instance.property = [property]
-    elif type == "object_property":
-        info_instance.content = [information]
-        info_instance.type = ["object_property"]
-        info_instance.property = [property] 
+    info_instance.content = [fields["content"]]
+    info_instance.type = [fields["type"]]
+    if fields["property"] is not None:
+        info_instance.property = [fields["property"]]
     return info_instance
 
+def _record_sourced_information(entity, source: str, type: str, file_path: str, superclass: List[str] = None, property = None, information: str = None):
+    """为实体记录来源信息，按配置写入SQLite旁表或作为SourcedInformation个体关联到实体"""
+    store = get_ontology_provenance_store(ONTOLOGY_CONFIG["ontology"])
+    # 在写入前取得全文索引，使待同步的索引不会同时包含并追加本条记录
+    search_index = get_ontology_provenance_search_index(ONTOLOGY_CONFIG["ontology"])
+    if store is not None:
+        fields = _sourced_information_fields(type, superclass, property, information)
+        added = store.add(entity.iri, source=source, file_path=file_path, **fields)
+        content = fields["content"]
+    else:
+        info_instance = _instantiate_sourced_information(source, type, file_path, superclass=superclass, property=property, information=information)
+        entity.has_information.append(info_instance)
+        added = True
+        content = info_instance.content[0]
+    if added:
+        if search_index is not None:
+            search_index.add(entity.iri, content, source, file_path)
+        emit_change(ONTOLOGY_CONFIG["ontology"], PROVENANCE_ADDED, entity.name, info_type=type, source=source)
+
 def _merge_entities(entities: List[base_data_structures.Entity], source: str, file_path: str):
     """合并实体(类)"""
     namespace = ONTOLOGY_CONFIG["classes"]
@@ -89,26 +144,20 @@ def _merge_entities(entities: List[base_data_structures.Entity], source: str, fi
             if not _class_exists(entity.name):
                 with namespace:
                     new_class = types.new_class(entity.name, (Thing,))
+                _record_new_class(new_class)
                 with meta:
                     if entity.information:
-                        # 创建SourcedInformation实例
-                        info_instance = _instantiate_sourced_information(source, "entity", file_path, information=entity.information)
-                        # 关联到类
-                        new_class.has_information.append(info_instance)
+                        # 记录来源信息并关联到类
+                        _record_sourced_information(new_class, source, "entity", file_path, information=entity.information)
             else:
                 existing_class = namespace[entity.name]
                 if entity.information:
                     # 检查是否已存在相同的信息
-                    exists = False
-                    for info in existing_class.has_information:
-                        if info.content == entity.information and info.source == source:
-                            exists = True
-                            break
+                    exists = entity.information in get_provenance(ONTOLOGY_CONFIG["ontology"]).contents(existing_class.iri, source)
                     
                     if not exists:
-                        # 创建新的SourcedInformation实例
-                        info_instance = _instantiate_sourced_information(source, "entity", file_path, information=entity.information)
-                        existing_class.has_information.append(info_instance)
+                        # 记录新的来源信息
+                        _record_sourced_information(existing_class, source, "entity", file_path, information=entity.information)
         except Exception as e:
             print(f"添加实体 {entity.name} 失败: {e}")
 
@@ -130,14 +179,13 @@ def _merge_hierarchy(hierarchies: List[base_data_structures.Hierarchy], source:
                     superclass = namespace[sup]
                     if superclass not in subclass.is_a:
                         subclass.is_a.append(superclass)
+                        _record_new_parent(subclass, superclass)
                         added_new = True
                 
                 # 只在添加了新父类时添加information
                 if added_new and hierarchy.information:
-                    # 创建SourcedInformation实例
-                    info_instance = _instantiate_sourced_information(source, "hierarchy", file_path, superclass=hierarchy.superclass, information=hierarchy.information)
-                    # 关联到类
-                    subclass.has_information.append(info_instance)
+                    # 记录来源信息并关联到类
+                    _record_sourced_information(subclass, source, "hierarchy", file_path, superclass=hierarchy.superclass, information=hierarchy.information)
             else:
                 if not _class_exists(hierarchy.subclass):
                     print(f"类 {hierarchy.subclass} 不存在")
@@ -151,12 +199,16 @@ def _merge_hierarchy(hierarchies: List[base_data_structures.Hierarchy], source:
 def _merge_disjointness(disjointness: List[base_data_structures.Disjointness]):
     """合并不相交关系"""
     namespace = ONTOLOGY_CONFIG["classes"]
+    store = get_disjointness_store(ONTOLOGY_CONFIG["ontology"])
     for disj in disjointness:
         try:
             if _class_exists(disj.class1) and _class_exists(disj.class2):
                 class1 = namespace[disj.class1]
                 class2 = namespace[disj.class2]
-                AllDisjoint([class1, class2])
+                # 已记录的类对不再重复写入公理，压缩时再合并为n元公理
+                if store.add(class1, class2):
+                    AllDisjoint([class1, class2])
+                    emit_change(ONTOLOGY_CONFIG["ontology"], DISJOINTNESS_ADDED, class1.name, other=class2.name)
         except Exception as e:
             print(f"添加不相交关系 {disj.class1} <-×-> {disj.class2} 失败: {e}")
 
@@ -164,11 +216,14 @@ def _merge_data_properties(data_properties: List[base_data_structures.DataProper
     """合并数据属性"""
     namespace = ONTOLOGY_CONFIG["data_properties"]
     class_namespace = ONTOLOGY_CONFIG["classes"]
+    composites = get_composite_class_cache(ONTOLOGY_CONFIG["ontology"])
+    accumulator = get_data_value_accumulator(ONTOLOGY_CONFIG["ontology"])
     for dp in data_properties:
         try:
-            if not dp.name in ONTOLOGY_CONFIG["ontology"].data_properties():
+            if not _property_exists("data_properties", dp.name, ONTOLOGY_CONFIG["ontology"].data_properties()):
                 with namespace:
                     new_dp = types.new_class(dp.name, (DataProperty,))
+                emit_change(ONTOLOGY_CONFIG["ontology"], PROPERTY_ADDED, dp.name, kind="data_property")
                     # print(f"创建数据属性 {dp.name}")
                     # if dp.information:
                     #     print(f"创建SourcedInformation实例")
@@ -211,51 +266,40 @@ def _merge_data_properties(data_properties: List[base_data_structures.DataProper
                                 owner_class = entity_classes[0]
                             # 如果有多个实体，创建它们的交集类
                             else:
-                                owner_class = And(entity_classes)
-
-                                domain_class_name = f"intersection_of_{'_'.join(entity_classes)}"
+                                domain_class_name = f"intersection_of_{'_'.join(entity_names)}"
 
-                                with class_namespace:
-                                    domain_class = types.new_class(domain_class_name, (Thing,))
-                                    domain_class.equivalent_to.append(owner_class)
-                                    owner_class = domain_class
+                                # 相同的交集复用已有的命名类
+                                owner_class, created = composites.get_or_create(class_namespace, domain_class_name, And(entity_classes))
+                                if created:
+                                    _record_new_class(owner_class)
 
 
-                            info_instance = _instantiate_sourced_information(source, "data_property", file_path, property=dp.name, information=value if not isinstance(value, list) else f"({', '.join(value)})")
-                            owner_class.has_information.append(info_instance)
+                            _record_sourced_information(owner_class, source, "data_property", file_path, property=dp.name, information=value if not isinstance(value, list) else f"({', '.join(value)})")
 
-                            # 获取当前值，如果不存在则初始化为空列表
-                            current_values = getattr(owner_class, dp.name, [])
-                            
-                            # 如果当前值不是列表，创建一个包含当前值的新列表
-                            if not isinstance(current_values, list):
-                                current_values = [current_values] if current_values is not None else []
-                            # 如果新值不在当前值列表中，添加它
+                            # 暂存新值，已有的值不再重复写入
                             if value is not None:
-                                if isinstance(value, list):
-                                    for v in value:
-                                        if v not in current_values:
-                                            current_values.append(v)
-                                elif value not in current_values:
-                                    current_values.append(value)
-                                
-                            # 更新属性值
-                            setattr(owner_class, dp.name, current_values)
+                                for v in (value if isinstance(value, list) else [value]):
+                                    accumulator.add(owner_class, dp.name, v)
                         except Exception as e:
                             print(f"为类 {owner_path} 添加数据属性值失败: {e}")
         except Exception as e:
             print(f"添加数据属性 {dp.name} 失败: {e}")
+    # 每个(类, 属性)只写入一次新增的值
+    accumulator.flush()
 
 def _merge_object_properties(object_properties: List[base_data_structures.ObjectProperty], source: str, file_path: str):
     """合并对象属性"""
     namespace = ONTOLOGY_CONFIG["object_properties"]
     class_namespace = ONTOLOGY_CONFIG["classes"]
     axiom_namespace = ONTOLOGY_CONFIG["axioms"]
+    index = get_restriction_index(ONTOLOGY_CONFIG["ontology"])
+    composites = get_composite_class_cache(ONTOLOGY_CONFIG["ontology"])
     for op in object_properties:
         try:
-            if not op.name in ONTOLOGY_CONFIG["ontology"].object_properties():
+            if not _property_exists("object_properties", op.name, ONTOLOGY_CONFIG["ontology"].object_properties()):
                 with namespace:
                     new_op = types.new_class(op.name, (ObjectProperty,))
+                emit_change(ONTOLOGY_CONFIG["ontology"], PROPERTY_ADDED, op.name, kind="object_property")
                     # if op.information:
                     #     info_instance = _instantiate_sourced_information(source, "object_property", information=op.information)
                     #     new_op.has_information.append(info_instance)
@@ -303,10 +347,14 @@ def _merge_object_properties(object_properties: List[base_data_structures.Object
                                     if instance.domain.type == 'single':
                                         # 单个类的情况,直接添加类限制
                                         domain_class = class_namespace[instance.domain.entity]
-                                        domain_class.is_a.append(restriction_expr)
+                                        # 相同限制只写入一次
+                                        if index.add(domain_class, restriction_expr):
+                                            domain_class.is_a.append(restriction_expr)
+                                            _record_new_restriction(domain_class, restriction_expr, op.name)
                                         
-                                        info_instance = _instantiate_sourced_information(source, "object_property", file_path, property=op.name, information=f"{instance.range.type}({instance.range.entity})")
-                                        domain_class.has_information.append(info_instance)
+                                        information = f"{instance.range.type}({instance.range.entity})"
+                                        if index.add_provenance(domain_class, op.name, information, source):
+                                            _record_sourced_information(domain_class, source, "object_property", file_path, property=op.name, information=information)
                                     else:
                                         # 创建一个新的命名类来表示domain表达式
                                         domain_class_name = f"{instance.domain.type}_of_{'_'.join(domain_entities)}"
@@ -315,13 +363,16 @@ def _merge_object_properties(object_properties: List[base_data_structures.Object
                                         else: # intersection 
                                             domain_expr = And([class_namespace[e] for e in domain_entities])
                                             
-                                        # 将domain表达式定义为一个命名类
-                                        with class_namespace:
-                                            domain_class = types.new_class(domain_class_name, (Thing,))
-                                            domain_class.equivalent_to.append(domain_expr)
+                                        # 将domain表达式定义为一个命名类，相同的复合定义域复用已有的类
+                                        domain_class, created = composites.get_or_create(class_namespace, domain_class_name, domain_expr)
+                                        if index.add(domain_class, restriction_expr):
                                             domain_class.is_a.append(restriction_expr)
-                                        info_instance = _instantiate_sourced_information(source, "object_property", file_path, property=op.name, information=f"{instance.restriction}({range_expr})")
-                                        domain_class.has_information.append(info_instance)
+                                            _record_new_restriction(domain_class, restriction_expr, op.name)
+                                        if created:
+                                            _record_new_class(domain_class)
+                                        information = f"{instance.restriction}({range_expr})"
+                                        if index.add_provenance(domain_class, op.name, information, source):
+                                            _record_sourced_information(domain_class, source, "object_property", file_path, property=op.name, information=information)
                     except Exception as e:
                         print(f"设置对象属性 {op.name} 的实例域和值域失败: {e}")
                     
@@ -0,0 +1,192 @@
+import hashlib
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from autology_constructor.change_feed import ChangeEvent, ONTOLOGY_REWRITTEN, get_change_feed
+from autology_constructor.provenance_store import Provenance, get_provenance
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS provenance_fts USING fts5 (
+    entity_iri UNINDEXED,
+    content,
+    source,
+    file_path
+);
+CREATE TABLE IF NOT EXISTS provenance_fts_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL,
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO provenance_fts_state VALUES (0, 0, 0);
+"""
+
+MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def _record_hash(entity_iri: str, content: str, source: str, file_path: str) -> int:
+    text = "\x1f".join((entity_iri, content or "", source or "", file_path or ""))
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def records_signature(records: Iterable[Dict]) -> str:
+    """来源信息记录集合的签名（记录数与哈希和），与顺序无关"""
+    count = 0
+    total = 0
+    for r in records:
+        count += 1
+        total += _record_hash(r["entity_iri"], r.get("content"), r.get("source"), r.get("file_path"))
+    return f"{count}:{total & MASK:016x}"
+
+
+def _to_match_query(text: str) -> str:
+    """将自由文本转为FTS5查询：每个词作为短语（可含DOI等标点），词之间为AND"""
+    terms = text.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class ProvenanceSearchIndex:
+    """来源信息全文索引
+
+    基于SQLite FTS5对来源信息的content、source和file_path建立倒排索引，
+    按BM25排序查找证据中提到某个术语、DOI或章节的实体，无需遍历每个类的has_information。
+    索引随写入维护已索引记录的签名，sync时与来源信息的签名比较，不一致（如索引文件为空、
+    压缩删除了记录）时整体重建。
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+
+    def _insert(self, rows: List[tuple]):
+        """写入记录并更新签名，调用方负责事务"""
+        self.conn.executemany(
+            "INSERT INTO provenance_fts (entity_iri, content, source, file_path) VALUES (?, ?, ?, ?)", rows
+        )
+        count, total = self.conn.execute("SELECT count, total FROM provenance_fts_state").fetchone()
+        total = (int(total) + sum(_record_hash(*row) for row in rows)) & MASK
+        # SQLite整数为有符号64位，以有符号形式存储
+        self.conn.execute(
+            "UPDATE provenance_fts_state SET count = ?, total = ?",
+            (count + len(rows), total - (1 << 64) if total >= (1 << 63) else total)
+        )
+
+    def add(self, entity_iri: str, content: str, source: str = "", file_path: str = ""):
+        self.add_many([{"entity_iri": entity_iri, "content": content, "source": source, "file_path": file_path}])
+
+    def add_many(self, records: Iterable[Dict]):
+        rows = [
+            (r["entity_iri"], r.get("content") or "", r.get("source") or "", r.get("file_path") or "")
+            for r in records
+        ]
+        with self.conn:
+            self._insert(rows)
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM provenance_fts")
+            self.conn.execute("UPDATE provenance_fts_state SET count = 0, total = 0")
+
+    @property
+    def signature(self) -> str:
+        count, total = self.conn.execute("SELECT count, total FROM provenance_fts_state").fetchone()
+        return f"{count}:{total & MASK:016x}"
+
+    def rebuild(self, provenance: Provenance) -> int:
+        """从来源信息（旁表或SourcedInformation个体）重建索引"""
+        records = provenance.all_records()
+        self.clear()
+        self.add_many(records)
+        return len(records)
+
+    def sync(self, provenance: Provenance) -> bool:
+        """索引与来源信息不一致时重建，返回是否重建"""
+        records = provenance.all_records()
+        if records_signature(records) == self.signature:
+            return False
+        self.clear()
+        self.add_many(records)
+        return True
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM provenance_fts").fetchone()[0]
+
+    def search(self, query: str, limit: int = 20, source: Optional[str] = None, raw: bool = False) -> List[Dict]:
+        """BM25排序的全文检索
+
+        Args:
+            query: 检索词；raw为True时按FTS5查询语法原样使用
+            limit: 最多返回的记录数
+            source: 只返回来自该来源的记录
+        """
+        match = query if raw else _to_match_query(query)
+        if not match:
+            return []
+        sql = "SELECT entity_iri, content, source, file_path, bm25(provenance_fts) AS rank FROM provenance_fts WHERE provenance_fts MATCH ?"
+        params = [match]
+        if source is not None:
+            sql += " AND source = ?"
+            params.append(source)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        # bm25()越小越相关，取反后作为得分
+        return [
+            {
+                "entity_iri": row["entity_iri"],
+                "content": row["content"],
+                "source": row["source"],
+                "file_path": row["file_path"],
+                "score": -row["rank"]
+            }
+            for row in self.conn.execute(sql, params)
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+class _AttachedIndex:
+    """本体关联的全文索引：首次使用和本体整体改写后与来源信息同步"""
+
+    def __init__(self, ontology, index: ProvenanceSearchIndex):
+        self.ontology = ontology
+        self.index = index
+        self.needs_sync = True
+        get_change_feed(ontology).subscribe(self.on_change)
+
+    def on_change(self, event: ChangeEvent):
+        if event.type == ONTOLOGY_REWRITTEN:
+            self.needs_sync = True
+
+
+_indexes: Dict[str, ProvenanceSearchIndex] = {}
+_attached: Dict[int, _AttachedIndex] = {}
+
+
+def get_provenance_search_index(path: str) -> ProvenanceSearchIndex:
+    """获取指定数据库文件的共享全文索引"""
+    index = _indexes.get(path)
+    if index is None:
+        index = _indexes[path] = ProvenanceSearchIndex(path)
+    return index
+
+
+def attach_provenance_search_index(ontology, index: Optional[ProvenanceSearchIndex]):
+    """为本体关联持久化的全文索引，传入None时取消关联"""
+    previous = _attached.pop(id(ontology), None)
+    if previous is not None and previous.ontology is ontology:
+        get_change_feed(ontology).unsubscribe(previous.on_change)
+    if index is not None:
+        _attached[id(ontology)] = _AttachedIndex(ontology, index)
+
+
+def get_ontology_provenance_search_index(ontology) -> Optional[ProvenanceSearchIndex]:
+    """本体关联的全文索引（必要时先与来源信息同步），未关联时返回None"""
+    attached = _attached.get(id(ontology))
+    if attached is None or attached.ontology is not ontology:
+        return None
+    if attached.needs_sync:
+        attached.index.sync(get_provenance(ontology))
+        attached.needs_sync = False
+    return attached.index
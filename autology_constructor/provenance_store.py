@@ -0,0 +1,231 @@
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+
+PROVENANCE_FIELDS = ("type", "content", "source", "file_path", "property")
+
+
+def information_records(entity) -> Iterator[Dict]:
+    """实体上SourcedInformation个体展开后的来源信息记录"""
+    for info in getattr(entity, "has_information", None) or []:
+        for field in zip(*(getattr(info, f) or [""] for f in PROVENANCE_FIELDS)):
+            yield {"entity_iri": entity.iri, **dict(zip(PROVENANCE_FIELDS, field))}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS provenance (
+    id INTEGER PRIMARY KEY,
+    entity_iri TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content TEXT NOT NULL,
+    source TEXT NOT NULL,
+    file_path TEXT NOT NULL DEFAULT '',
+    property TEXT NOT NULL DEFAULT '',
+    UNIQUE (entity_iri, type, content, source, file_path, property)
+);
+CREATE INDEX IF NOT EXISTS provenance_entity ON provenance (entity_iri);
+CREATE INDEX IF NOT EXISTS provenance_entity_source ON provenance (entity_iri, source);
+CREATE INDEX IF NOT EXISTS provenance_source ON provenance (source);
+"""
+
+
+class ProvenanceStore:
+    """来源信息旁表
+
+    将来源信息（原SourcedInformation个体的content/source/file_path/type/property）
+    存入以实体IRI为键的SQLite表，不再占用OWL图中的三元组。
+    需要时可通过export_to_ontology重新导出为SourcedInformation个体。
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+
+    def add(self, entity_iri: str, type: str, content: str, source: str,
+            file_path: str = "", property: Optional[str] = None) -> bool:
+        """记录一条来源信息，相同记录已存在时返回False"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO provenance (entity_iri, type, content, source, file_path, property) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (entity_iri, type, content, source, file_path or "", property or "")
+            )
+        return cursor.rowcount > 0
+
+    def add_many(self, records: Iterable[Dict]) -> int:
+        """批量写入记录，返回新增的记录数"""
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO provenance (entity_iri, type, content, source, file_path, property) "
+                "VALUES (:entity_iri, :type, :content, :source, :file_path, :property)",
+                ({**r, "file_path": r.get("file_path") or "", "property": r.get("property") or ""} for r in records)
+            )
+        return self.conn.total_changes - before
+
+    def records(self, entity_iri: str, source: Optional[str] = None) -> List[Dict]:
+        """实体的来源信息，可按来源过滤"""
+        if source is None:
+            rows = self.conn.execute(
+                "SELECT * FROM provenance WHERE entity_iri = ? ORDER BY id", (entity_iri,)
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM provenance WHERE entity_iri = ? AND source = ? ORDER BY id", (entity_iri, source)
+            )
+        return [dict(row) for row in rows]
+
+    def contents(self, entity_iri: str, source: Optional[str] = None) -> List[str]:
+        return [r["content"] for r in self.records(entity_iri, source)]
+
+    def sources(self, entity_iri: str) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT DISTINCT source FROM provenance WHERE entity_iri = ? ORDER BY source", (entity_iri,)
+        )
+        return [row[0] for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """每个实体IRI的来源信息记录数"""
+        rows = self.conn.execute("SELECT entity_iri, COUNT(*) FROM provenance GROUP BY entity_iri")
+        return dict(rows)
+
+    def all_records(self, type: Optional[str] = None) -> List[Dict]:
+        """所有记录，可按类型过滤"""
+        if type is None:
+            rows = self.conn.execute("SELECT * FROM provenance ORDER BY id")
+        else:
+            rows = self.conn.execute("SELECT * FROM provenance WHERE type = ? ORDER BY id", (type,))
+        return [dict(row) for row in rows]
+
+    def remove_orphans(self, entity_iris: Set[str]) -> int:
+        """删除实体已不在本体中的记录，返回删除的记录数"""
+        orphans = [(iri,) for iri in self.counts() if iri not in entity_iris]
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany("DELETE FROM provenance WHERE entity_iri = ?", orphans)
+        return self.conn.total_changes - before
+
+    def entities_by_source(self, source: str) -> List[str]:
+        """来自某一来源的所有实体IRI"""
+        rows = self.conn.execute(
+            "SELECT DISTINCT entity_iri FROM provenance WHERE source = ? ORDER BY entity_iri", (source,)
+        )
+        return [row[0] for row in rows]
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM provenance").fetchone()[0]
+
+    def import_from_ontology(self, ontology, meta, remove: bool = False) -> int:
+        """将本体中的SourcedInformation个体迁移到旁表
+
+        Args:
+            remove: 迁移后是否从本体中删除这些个体
+        """
+        from owlready2 import destroy_entity
+
+        records = []
+        migrated = []
+        for entity in list(ontology.classes()) + list(ontology.individuals()):
+            migrated.extend(getattr(entity, "has_information", None) or [])
+            records.extend(information_records(entity))
+        added = self.add_many(records)
+        if remove:
+            for info in set(migrated):
+                destroy_entity(info)
+        return added
+
+    def export_to_ontology(self, ontology, meta) -> int:
+        """将旁表中的记录导出为SourcedInformation个体，返回导出的记录数"""
+        exported = 0
+        with meta:
+            for row in self.conn.execute("SELECT * FROM provenance ORDER BY id"):
+                entity = ontology.world[row["entity_iri"]]
+                if entity is None:
+                    continue
+                info = meta.SourcedInformation()
+                info.type = [row["type"]]
+                info.content = [row["content"]]
+                info.source = [row["source"]]
+                info.file_path = [row["file_path"]]
+                if row["property"]:
+                    info.property = [row["property"]]
+                entity.has_information.append(info)
+                exported += 1
+        return exported
+
+    def close(self):
+        self.conn.close()
+
+
+class OwlProvenance:
+    """SourcedInformation个体中来源信息的只读视图，读取接口与ProvenanceStore一致"""
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+
+    def _entities(self):
+        return list(self.ontology.classes()) + list(self.ontology.individuals())
+
+    def records(self, entity_iri: str, source: Optional[str] = None) -> List[Dict]:
+        entity = self.ontology.world[entity_iri]
+        if entity is None:
+            return []
+        return [r for r in information_records(entity) if source is None or r["source"] == source]
+
+    def contents(self, entity_iri: str, source: Optional[str] = None) -> List[str]:
+        return [r["content"] for r in self.records(entity_iri, source)]
+
+    def sources(self, entity_iri: str) -> List[str]:
+        return sorted({r["source"] for r in self.records(entity_iri)})
+
+    def counts(self) -> Dict[str, int]:
+        counts = {}
+        for entity in self._entities():
+            n = len(getattr(entity, "has_information", None) or [])
+            if n:
+                counts[entity.iri] = n
+        return counts
+
+    def all_records(self, type: Optional[str] = None) -> List[Dict]:
+        return [
+            r for entity in self._entities() for r in information_records(entity)
+            if type is None or r["type"] == type
+        ]
+
+
+Provenance = Union[ProvenanceStore, OwlProvenance]
+
+_stores: Dict[str, ProvenanceStore] = {}
+_attached: Dict[int, ProvenanceStore] = {}
+_attached_owners: Dict[int, object] = {}
+
+
+def get_provenance_store(path: str) -> ProvenanceStore:
+    """获取指定数据库文件的共享来源信息旁表"""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = ProvenanceStore(path)
+    return store
+
+
+def attach_provenance_store(ontology, store: Optional[ProvenanceStore]):
+    """指定本体的来源信息写入旁表，传入None时恢复为SourcedInformation个体"""
+    if store is None:
+        _attached.pop(id(ontology), None)
+        _attached_owners.pop(id(ontology), None)
+        return
+    _attached[id(ontology)] = store
+    _attached_owners[id(ontology)] = ontology
+
+
+def get_ontology_provenance_store(ontology) -> Optional[ProvenanceStore]:
+    """本体关联的来源信息旁表，来源信息保存为OWL个体时返回None"""
+    if ontology is None or _attached_owners.get(id(ontology)) is not ontology:
+        return None
+    return _attached[id(ontology)]
+
+
+def get_provenance(ontology) -> Provenance:
+    """本体来源信息的读取接口：关联了旁表时为旁表，否则为SourcedInformation个体视图"""
+    store = get_ontology_provenance_store(ontology)
+    return store if store is not None else OwlProvenance(ontology)
@@ -0,0 +1,141 @@
+import multiprocessing
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import owlready2
+from owlready2 import World, ThingClass, close_world, sync_reasoner_pellet, OwlReadyInconsistentOntologyError
+
+from autology_constructor.ntriples import ontology_to_ntriples, parse_ntriples, fingerprint_triples, load_ntriples
+from autology_constructor.module_extraction import extract_module
+from autology_constructor.ontology_fingerprint import ontology_fingerprint
+
+REASONING_IRI = "http://www.test.org/chem_ontologies/reasoning.owl"
+
+
+class ReasoningTimeoutError(TimeoutError):
+    """推理超过时限"""
+
+
+def _run_reasoner(data: bytes, java_exe: str, closed_world: bool) -> Dict:
+    """在子进程中对N-Triples副本运行Pellet"""
+    owlready2.JAVA_EXE = java_exe
+    world = World()
+    try:
+        onto = load_ntriples(data, world, REASONING_IRI)
+        if closed_world:
+            close_world(onto)
+        try:
+            with onto:
+                sync_reasoner_pellet(
+                    world,
+                    infer_property_values = True,
+                    infer_data_property_values = True
+                )
+        except OwlReadyInconsistentOntologyError:
+            return {"consistent": False, "inconsistent_classes": [], "inferred_hierarchy": {}}
+        return {
+            "consistent": True,
+            "inconsistent_classes": [cls.name for cls in world.inconsistent_classes()],
+            "inferred_hierarchy": {
+                cls.name: [p.name for p in cls.is_a if isinstance(p, ThingClass)]
+                for cls in onto.classes()
+            }
+        }
+    finally:
+        world.close()
+
+
+class ReasoningService:
+    """推理服务
+
+    在本体副本上运行Pellet，不修改原本体（包括close_world）。推理在子进程池中执行并受时限约束，
+    避免缓慢的推理阻塞LangGraph工作流。结果按本体公理的内容指纹缓存，本体未变化时直接返回缓存。
+    """
+
+    def __init__(self, processes: int = 1, timeout: Optional[float] = 600, cache_size: int = 32):
+        self.processes = processes
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.get_context("spawn").Pool(self.processes)
+        return self._pool
+
+    def _lookup(self, key) -> Optional[Dict]:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return dict(self._cache[key], cached=True)
+        return None
+
+    def _remember(self, key, result: Dict):
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _run(self, data: bytes, closed_world: bool, timeout: Optional[float]) -> Dict:
+        key = (fingerprint_triples(parse_ntriples(data)), closed_world)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        pending = self._get_pool().apply_async(_run_reasoner, (data, owlready2.JAVA_EXE, closed_world))
+        try:
+            result = pending.get(self.timeout if timeout is None else timeout)
+        except multiprocessing.TimeoutError:
+            # 终止卡住的工作进程，下次调用时重建进程池
+            self._pool.terminate()
+            self._pool = None
+            raise ReasoningTimeoutError("推理超时")
+
+        result["fingerprint"] = key[0]
+        self._remember(key, result)
+        return dict(result, cached=False)
+
+    def reason(self, ontology, closed_world: bool = True, timeout: Optional[float] = None) -> Dict:
+        """对整个本体推理，返回一致性、不一致类和推理后的层次结构
+
+        本体整体不一致时consistent为False且inconsistent_classes为空，调用方须先检查consistent。
+        """
+        # 先按增量指纹查缓存，本体未变化时无需序列化
+        live_key = ("ontology", ontology_fingerprint(ontology), closed_world)
+        cached = self._lookup(live_key)
+        if cached is not None:
+            return cached
+        result = self._run(ontology_to_ntriples(ontology), closed_world, timeout)
+        self._remember(live_key, {k: v for k, v in result.items() if k != "cached"})
+        return result
+
+    def reason_module(self, ontology, seeds: Iterable, closed_world: bool = True,
+                      timeout: Optional[float] = None) -> Dict:
+        """只对种子类的模块推理"""
+        seeds = list(seeds)
+        seed_names = tuple(sorted(getattr(seed, "name", seed) for seed in seeds))
+        live_key = ("module", ontology_fingerprint(ontology), seed_names, closed_world)
+        cached = self._lookup(live_key)
+        if cached is not None:
+            return cached
+        result = self._run(extract_module(ontology, seeds), closed_world, timeout)
+        self._remember(live_key, {k: v for k, v in result.items() if k != "cached"})
+        return result
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+
+_service: Optional[ReasoningService] = None
+
+
+def get_reasoning_service() -> ReasoningService:
+    """获取进程内共享的推理服务"""
+    global _service
+    if _service is None:
+        _service = ReasoningService()
+    return _service
@@ -0,0 +1,269 @@
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from autology_constructor.ntriples import (
+    Triple, parse_ntriples, format_triple, canonicalize_blank_nodes, triple_hash,
+    fingerprint_triples, ontology_to_ntriples, file_to_ntriples, load_ntriples
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS triples (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id TEXT PRIMARY KEY,
+    parent TEXT,
+    is_base INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    message TEXT
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    snapshot TEXT NOT NULL,
+    triple INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    PRIMARY KEY (snapshot, triple)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tags (
+    name TEXT PRIMARY KEY,
+    snapshot TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _triple_id(triple: Triple) -> int:
+    """三元组的64位哈希，转为SQLite可存储的有符号整数"""
+    h = triple_hash(triple)
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def _canonical_triples(data) -> Dict[int, Triple]:
+    return {_triple_id(t): t for t in canonicalize_blank_nodes(parse_ntriples(data))}
+
+
+class SnapshotStore:
+    """内容寻址的本体快照库
+
+    每个版本以规范化三元组集合的指纹为ID，内容相同的版本（如test.owl与backup-4.owl）只存一份。
+    三元组文本按哈希去重存储一次，每个快照只记录相对父快照增删的三元组ID，
+    每隔base_interval个增量存一个完整基准，恢复时最多回放base_interval个增量。
+    """
+
+    def __init__(self, path: str, base_interval: int = 20):
+        self.path = path
+        self.base_interval = base_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    # 元数据
+
+    @property
+    def head(self) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'head'").fetchone()
+        return row[0] if row else None
+
+    def _set_head(self, snapshot_id: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('head', ?)", (snapshot_id,))
+
+    def resolve(self, ref: str) -> str:
+        """将标签、ID或ID前缀解析为快照ID"""
+        row = self.conn.execute("SELECT snapshot FROM tags WHERE name = ?", (ref,)).fetchone()
+        if row:
+            return row[0]
+        rows = self.conn.execute("SELECT id FROM snapshots WHERE id LIKE ?", (ref + "%",)).fetchall()
+        if len(rows) == 1:
+            return rows[0][0]
+        if not rows:
+            raise KeyError(f"快照 {ref} 不存在")
+        raise KeyError(f"快照前缀 {ref} 不唯一")
+
+    def tag(self, name: str, ref: str):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO tags (name, snapshot) VALUES (?, ?)", (name, self.resolve(ref)))
+
+    def tags(self) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT name, snapshot FROM tags ORDER BY name"))
+
+    def log(self) -> List[Dict]:
+        """所有快照（按创建时间），附带各自的标签"""
+        tags = {}
+        for name, snapshot in self.conn.execute("SELECT name, snapshot FROM tags"):
+            tags.setdefault(snapshot, []).append(name)
+        rows = self.conn.execute(
+            "SELECT id, parent, is_base, depth, size, created, message FROM snapshots ORDER BY created"
+        )
+        return [
+            {
+                "id": row[0], "parent": row[1], "is_base": bool(row[2]), "depth": row[3],
+                "size": row[4], "created": row[5], "message": row[6], "tags": tags.get(row[0], [])
+            }
+            for row in rows
+        ]
+
+    # 写入
+
+    def commit(self, data: bytes, message: str = "", tag: Optional[str] = None,
+               parent: Optional[str] = None) -> str:
+        """保存N-Triples数据为新快照，返回快照ID；内容已存在时只更新标签和head
+
+        Args:
+            parent: 增量的基准快照，默认为当前head
+        """
+        triples = _canonical_triples(data)
+        snapshot_id = fingerprint_triples(triples.values())
+        with self.conn:
+            exists = self.conn.execute("SELECT 1 FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+            if not exists:
+                parent = self.resolve(parent) if parent else self.head
+                self._store(snapshot_id, triples, parent, message)
+            self._set_head(snapshot_id)
+            if tag:
+                self.conn.execute("INSERT OR REPLACE INTO tags (name, snapshot) VALUES (?, ?)", (tag, snapshot_id))
+        return snapshot_id
+
+    def _store(self, snapshot_id: str, triples: Dict[int, Triple], parent: Optional[str], message: str):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO triples (id, text) VALUES (?, ?)",
+            ((tid, format_triple(t)) for tid, t in triples.items())
+        )
+        depth = 0
+        if parent is not None:
+            depth = self.conn.execute("SELECT depth FROM snapshots WHERE id = ?", (parent,)).fetchone()[0] + 1
+        is_base = parent is None or depth >= self.base_interval
+        if is_base:
+            depth = 0
+            changes = ((snapshot_id, tid, 1) for tid in triples)
+        else:
+            previous = self.triple_ids(parent)
+            current = set(triples)
+            changes = [(snapshot_id, tid, 1) for tid in current - previous]
+            changes += [(snapshot_id, tid, 0) for tid in previous - current]
+        self.conn.executemany("INSERT INTO deltas (snapshot, triple, added) VALUES (?, ?, ?)", changes)
+        self.conn.execute(
+            "INSERT INTO snapshots (id, parent, is_base, depth, size, created, message) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (snapshot_id, parent, int(is_base), depth, len(triples), time.time(), message)
+        )
+
+    def commit_ontology(self, ontology, message: str = "", tag: Optional[str] = None) -> str:
+        return self.commit(ontology_to_ntriples(ontology), message, tag)
+
+    def commit_file(self, path: str, message: str = "", tag: Optional[str] = None) -> str:
+        return self.commit(file_to_ntriples(path), message or os.path.basename(path), tag)
+
+    # 读取
+
+    def triple_ids(self, ref: str) -> Set[int]:
+        """快照的三元组ID集合：从最近的基准开始依次回放增量"""
+        chain = []
+        snapshot_id = self.resolve(ref)
+        while True:
+            parent, is_base = self.conn.execute(
+                "SELECT parent, is_base FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+            chain.append(snapshot_id)
+            if is_base:
+                break
+            snapshot_id = parent
+        ids: Set[int] = set()
+        for snapshot_id in reversed(chain):
+            for tid, added in self.conn.execute("SELECT triple, added FROM deltas WHERE snapshot = ?", (snapshot_id,)):
+                if added:
+                    ids.add(tid)
+                else:
+                    ids.discard(tid)
+        return ids
+
+    def _texts(self, ids: Iterable[int]) -> Iterator[str]:
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for (text,) in self.conn.execute(f"SELECT text FROM triples WHERE id IN ({placeholders})", chunk):
+                yield text
+
+    def restore(self, ref: str) -> bytes:
+        """以N-Triples字节串恢复快照"""
+        return "".join(sorted(self._texts(self.triple_ids(ref)))).encode("utf-8")
+
+    def restore_to_file(self, ref: str, path: str, ontology_iri: str, format: str = "rdfxml"):
+        """将快照恢复为本体文件"""
+        data = self.restore(ref)
+        if format == "ntriples":
+            with open(path, "wb") as f:
+                f.write(data)
+            return
+        from owlready2 import World
+
+        world = World()
+        try:
+            onto = load_ntriples(data, world, ontology_iri)
+            onto.save(file=path, format=format)
+        finally:
+            world.close()
+
+    def diff(self, old: str, new: str) -> Tuple[List[str], List[str]]:
+        """两个快照之间新增和删除的三元组（N-Triples行）"""
+        old_ids = self.triple_ids(old)
+        new_ids = self.triple_ids(new)
+        added = sorted(self._texts(new_ids - old_ids))
+        removed = sorted(self._texts(old_ids - new_ids))
+        return added, removed
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本体快照库")
+    parser.add_argument("store", help="快照库文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_commit = sub.add_parser("commit", help="保存本体文件为快照")
+    p_commit.add_argument("file")
+    p_commit.add_argument("-m", "--message", default="")
+    p_commit.add_argument("-t", "--tag")
+    sub.add_parser("log", help="列出快照")
+    p_tag = sub.add_parser("tag", help="为快照打标签")
+    p_tag.add_argument("name")
+    p_tag.add_argument("ref")
+    p_restore = sub.add_parser("restore", help="恢复快照到文件")
+    p_restore.add_argument("ref")
+    p_restore.add_argument("file")
+    p_restore.add_argument("--iri", default="http://www.test.org/chem_ontologies/chem_ontology.owl")
+    p_restore.add_argument("--format", default="rdfxml", choices=["rdfxml", "ntriples"])
+    p_diff = sub.add_parser("diff", help="比较两个快照")
+    p_diff.add_argument("old")
+    p_diff.add_argument("new")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store)
+    if args.command == "commit":
+        print(store.commit_file(args.file, args.message, args.tag))
+    elif args.command == "log":
+        for entry in store.log():
+            kind = "base" if entry["is_base"] else "delta"
+            tags = f" [{', '.join(entry['tags'])}]" if entry["tags"] else ""
+            print(f"{entry['id']} {kind} {entry['size']} triples{tags} {entry['message']}")
+    elif args.command == "tag":
+        store.tag(args.name, args.ref)
+    elif args.command == "restore":
+        store.restore_to_file(args.ref, args.file, args.iri, args.format)
+    elif args.command == "diff":
+        added, removed = store.diff(args.old, args.new)
+        for line in removed:
+            print("- " + line, end="")
+        for line in added:
+            print("+ " + line, end="")
+    store.close()
@@ -0,0 +1,168 @@
+from typing import Dict, List
+
+# owlready2在Ontology实例上绑定的三元组写入方法
+OBJ_METHODS = ("_add_obj_triple_spo", "_set_obj_triple_spo", "_del_obj_triple_spo")
+DATA_METHODS = ("_add_data_triple_spod", "_set_data_triple_spod", "_del_data_triple_spod")
+
+OBJ = "o"
+DATA = "d"
+
+
+class TripleListener:
+    """三元组变更监听接口
+
+    row为quadstore中的原始行：对象三元组为(s, p, o)，数据三元组为(s, p, o, d)。
+    """
+
+    def triple_added(self, kind: str, row: tuple):
+        pass
+
+    def triple_removed(self, kind: str, row: tuple):
+        pass
+
+
+class _TripleHooks:
+    """拦截本体的三元组写入方法，将实际增删的(去重)三元组分发给监听者
+
+    新增是否生效由quadstore连接的total_changes判断（owlready2以INSERT OR IGNORE写入），
+    无需额外查询。另在连接上安装临时触发器，统计本体上下文中objs/datas的行变更数；
+    与分发给监听者的变更数不符时，说明有绕过拦截的写入（如destroy_entity），计入external_writes。
+    """
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        self.listeners: List[TripleListener] = []
+        self.originals = {}
+        self.external_writes = 0
+        self._install_counter()
+        self._observed = self._counted()
+        for name in OBJ_METHODS + DATA_METHODS:
+            original = getattr(ontology, name, None)
+            if original is not None:
+                self.originals[name] = original
+        wrappers = {
+            "_add_obj_triple_spo": self._add_obj, "_set_obj_triple_spo": self._set_obj,
+            "_del_obj_triple_spo": self._del_obj, "_add_data_triple_spod": self._add_data,
+            "_set_data_triple_spod": self._set_data, "_del_data_triple_spod": self._del_data,
+        }
+        for name in self.originals:
+            setattr(ontology, name, wrappers[name])
+
+    def _install_counter(self):
+        c = self.ontology.graph.c
+        db = self.ontology.world.graph.db
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS triple_changes (c INTEGER PRIMARY KEY, n INTEGER NOT NULL)")
+        db.execute("INSERT OR IGNORE INTO temp.triple_changes VALUES (?, 0)", (c,))
+        for table in ("objs", "datas"):
+            for event, condition in (("INSERT", f"NEW.c = {c}"), ("DELETE", f"OLD.c = {c}"),
+                                     ("UPDATE", f"OLD.c = {c} OR NEW.c = {c}")):
+                db.execute(
+                    f"CREATE TEMP TRIGGER IF NOT EXISTS triple_changes_{table}_{event.lower()}_{c} "
+                    f"AFTER {event} ON main.{table} WHEN {condition} "
+                    f"BEGIN UPDATE triple_changes SET n = n + 1 WHERE c = {c}; END"
+                )
+
+    def _counted(self) -> int:
+        return self._execute("SELECT n FROM temp.triple_changes WHERE c = ?", (self.ontology.graph.c,)).fetchone()[0]
+
+    def external_write_count(self) -> int:
+        """到目前为止发现的绕过拦截的写入次数，调用方比较前后两次的值判断增量状态是否可信"""
+        counted = self._counted()
+        if counted != self._observed:
+            self.external_writes += 1
+            self._observed = counted
+        return self.external_writes
+
+    @property
+    def complete(self) -> bool:
+        """是否拦截了全部写入方法"""
+        return len(self.originals) == len(OBJ_METHODS + DATA_METHODS)
+
+    def _execute(self, sql: str, params):
+        return self.ontology.world.graph.db.execute(sql, params)
+
+    def _changes(self) -> int:
+        return self.ontology.world.graph.db.total_changes
+
+    def match(self, kind: str, *terms) -> List[tuple]:
+        """本体中与给定项匹配的去重三元组，None表示任意值"""
+        if kind == OBJ:
+            columns, table = ("s", "p", "o"), "objs"
+        else:
+            columns, table = ("s", "p", "o", "d"), "datas"
+        sql = f"SELECT DISTINCT {', '.join(columns)} FROM {table} WHERE c = ?"
+        params = [self.ontology.graph.c]
+        for column, value in zip(columns, terms):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        return self._execute(sql, params).fetchall()
+
+    def _added(self, kind, row):
+        self._observed += 1
+        for listener in self.listeners:
+            listener.triple_added(kind, row)
+
+    def _removed(self, kind, rows):
+        for row in rows:
+            self._observed += 1
+            for listener in self.listeners:
+                listener.triple_removed(kind, tuple(row))
+
+    def _add_obj(self, s, p, o):
+        before = self._changes()
+        self.originals["_add_obj_triple_spo"](s, p, o)
+        if self._changes() != before:
+            self._added(OBJ, (s, p, o))
+
+    def _set_obj(self, s, p, o):
+        previous = self.match(OBJ, s, p, None)
+        self.originals["_set_obj_triple_spo"](s, p, o)
+        self._removed(OBJ, previous)
+        self._added(OBJ, (s, p, o))
+
+    def _del_obj(self, s=None, p=None, o=None):
+        previous = self.match(OBJ, s, p, o)
+        self.originals["_del_obj_triple_spo"](s, p, o)
+        self._removed(OBJ, previous)
+
+    def _add_data(self, s, p, o, d):
+        before = self._changes()
+        self.originals["_add_data_triple_spod"](s, p, o, d)
+        if self._changes() != before:
+            self._added(DATA, (s, p, o, d))
+
+    def _set_data(self, s, p, o, d):
+        previous = self.match(DATA, s, p, None, None)
+        self.originals["_set_data_triple_spod"](s, p, o, d)
+        self._removed(DATA, previous)
+        self._added(DATA, (s, p, o, d))
+
+    def _del_data(self, s=None, p=None, o=None, d=None):
+        previous = self.match(DATA, s, p, o, d)
+        self.originals["_del_data_triple_spod"](s, p, o, d)
+        self._removed(DATA, previous)
+
+
+_hooks: Dict[int, _TripleHooks] = {}
+
+
+def get_triple_hooks(ontology) -> _TripleHooks:
+    hooks = _hooks.get(id(ontology))
+    if hooks is None or hooks.ontology is not ontology:
+        hooks = _hooks[id(ontology)] = _TripleHooks(ontology)
+    return hooks
+
+
+def add_triple_listener(ontology, listener: TripleListener) -> _TripleHooks:
+    """注册三元组变更监听者，首次注册时安装拦截"""
+    hooks = get_triple_hooks(ontology)
+    if listener not in hooks.listeners:
+        hooks.listeners.append(listener)
+    return hooks
+
+
+def remove_triple_listener(ontology, listener: TripleListener):
+    hooks = _hooks.get(id(ontology))
+    if hooks is not None and listener in hooks.listeners:
+        hooks.listeners.remove(listener)
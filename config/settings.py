@@ -52,6 +52,18 @@ _ONTOLOGY_CONFIG = yaml_settings["ontology"]
 onto_path.append(_ONTOLOGY_CONFIG["ontology_directory_path"])
 owlready2.JAVA_EXE = _ONTOLOGY_CONFIG["java_exe"]
 ontology = get_ontology(_ONTOLOGY_CONFIG["ontology_iri"]).load(only_local=True)
+if _ONTOLOGY_CONFIG.get("journal_mode"):
+    # 在快照之上重放日志
+    from autology_constructor.ontology_journal import open_journal
+    open_journal(ontology, _ONTOLOGY_CONFIG["ontology_file_path"])
+if _ONTOLOGY_CONFIG.get("provenance_backend") == "sqlite":
+    # 来源信息写入SQLite旁表
+    from autology_constructor.provenance_store import attach_provenance_store, get_provenance_store
+    attach_provenance_store(ontology, get_provenance_store(_ONTOLOGY_CONFIG["provenance_db_path"]))
+if _ONTOLOGY_CONFIG.get("provenance_search_db_path"):
+    # 持久化全文索引，首次检索时与已有来源信息同步
+    from autology_constructor.provenance_search import attach_provenance_search_index, get_provenance_search_index
+    attach_provenance_search_index(ontology, get_provenance_search_index(_ONTOLOGY_CONFIG["provenance_search_db_path"]))
 
 
 LLM_CONFIG = yaml_settings["LLM"]
@@ -60,7 +72,12 @@ DATASET_CONSTRUCTION_CONFIG = yaml_settings["dataset_construction"]
 
 ONTOLOGY_CONFIG = {
     "ontology": ontology,
+    "ontology_file_path": _ONTOLOGY_CONFIG["ontology_file_path"],
     "closed_ontology_file_path": _ONTOLOGY_CONFIG["closed_ontology_iri"],
+    "provenance_backend": _ONTOLOGY_CONFIG.get("provenance_backend", "owl"),
+    "provenance_db_path": _ONTOLOGY_CONFIG.get("provenance_db_path"),
+    "provenance_search_db_path": _ONTOLOGY_CONFIG.get("provenance_search_db_path"),
+    "embedding_store_path": _ONTOLOGY_CONFIG.get("embedding_store_path"),
     "meta": ontology.get_namespace(_ONTOLOGY_CONFIG["namespace_meta_iri"]),
     "classes": ontology.get_namespace(_ONTOLOGY_CONFIG["namespace_classes_iri"]),
     "individuals": ontology.get_namespace(_ONTOLOGY_CONFIG["namespace_individuals_iri"]),
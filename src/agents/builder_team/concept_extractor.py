@@ -14,6 +14,8 @@ from langchain_core.prompts import PromptTemplate, PipelinePromptTemplate
 
 
 from config import settings
+from autology_constructor.embedding_store import get_embedding_store
+from autology_constructor.change_feed import emit_change, CLASS_ADDED, INDIVIDUAL_ADDED, PROPERTY_ADDED
  
 llm = ChatOpenAI(
     model=settings.LLM_CONFIG["model"],
@@ -226,8 +228,16 @@ def parse_llm_output(response_content: str) -> Tuple[List[ClassMetaData], List[D
             
     return class_concepts, data_properties
 
+def _store_embedding(embedding_store, iri: str, embedding: List[float]):
+    # A vector with the wrong dimension is skipped for this entity only, not the whole batch
+    try:
+        embedding_store.put(iri, embedding)
+    except ValueError as e:
+        print(f"Failed to store embedding for {iri}: {e}")
+
 def create_classes(ontology: Ontology, classes: List[ClassMetaData]):
     class_namespace = settings.ONTOLOGY_CONFIG["classes"]
+    embedding_store = get_embedding_store(settings.ONTOLOGY_CONFIG["embedding_store_path"])
 
     for class_meta in classes:
         # Check if class already exists
@@ -238,11 +248,14 @@ def create_classes(ontology: Ontology, classes: List[ClassMetaData]):
             with class_namespace:
                 new_class = types.new_class(name, (Thing,))
                 
-                new_class.embedding = class_meta.embedding
+                # 向量写入旁路存储，不作为注释写入本体
+                if class_meta.embedding:
+                    _store_embedding(embedding_store, new_class.iri, class_meta.embedding)
                 
                 new_class.location = [f"doi: {class_meta.location[0]} - page: {class_meta.location[1]}"]
                 
                 new_class.information = [class_meta.information]
+            emit_change(ontology, CLASS_ADDED, name, parents=[Thing.name])
         else:
             print(f"Class: {name} already exists")
             with class_namespace:
@@ -250,9 +263,11 @@ def create_classes(ontology: Ontology, classes: List[ClassMetaData]):
                 print(class_to_update)
                 class_to_update.location.append(f"doi: {class_meta.location[0]} - page: {class_meta.location[1]}")
                 class_to_update.information.append(class_meta.information)
+    embedding_store.flush()
 
 def create_individuals(ontology: Ontology, individuals: List[IndividualMetaData]):
     individual_namespace = settings.ONTOLOGY_CONFIG["individuals"]
+    embedding_store = get_embedding_store(settings.ONTOLOGY_CONFIG["embedding_store_path"])
     for individual_meta in individuals:
         name = individual_meta.name.replace(" ", "_").lower()
         if not individual_namespace[name] in ontology.individuals():
@@ -260,23 +275,27 @@ def create_individuals(ontology: Ontology, individuals: List[IndividualMetaData]
             with individual_namespace:
                 new_individual = Thing(name)
                 
-                # Create embedding annotation property
-                new_individual.embedding = individual_meta.embedding
+                # Store the embedding in the sidecar store instead of an annotation
+                if individual_meta.embedding:
+                    _store_embedding(embedding_store, new_individual.iri, individual_meta.embedding)
                 
                 # Create location annotation property
                 new_individual.location = [f"doi: {individual_meta.location[0]} - page: {individual_meta.location[1]}"]
                 
                 # Create information annotation property
                 new_individual.information = [individual_meta.information]
+            emit_change(ontology, INDIVIDUAL_ADDED, name)
         else:
             print(f"Individual: {name} already exists")
             with individual_namespace:
                 individual_to_update = individual_namespace[name]
                 individual_to_update.location.append(f"doi: {individual_meta.location[0]} - page: {individual_meta.location[1]}")
                 individual_to_update.information.append(individual_meta.information)
+    embedding_store.flush()
 
 def create_data_properties(ontology: Ontology, data_properties: List[DataPropertyMetaData]):
     data_property_namespace = settings.ONTOLOGY_CONFIG["data_properties"]
+    embedding_store = get_embedding_store(settings.ONTOLOGY_CONFIG["embedding_store_path"])
     for data_property_meta in data_properties:
         name = data_property_meta.name.replace(" ", "_").lower()
         if not data_property_namespace[name] in ontology.data_properties():
@@ -284,11 +303,13 @@ def create_data_properties(ontology: Ontology, data_properties: List[DataPropert
             with data_property_namespace:
                 new_data_property = types.new_data_property(name)
                 
-                new_data_property.embedding = data_property_meta.embedding
+                if data_property_meta.embedding:
+                    _store_embedding(embedding_store, new_data_property.iri, data_property_meta.embedding)
                 
                 new_data_property.location = [f"doi: {data_property_meta.location[0]} - page: {data_property_meta.location[1]}"]
                 
                 new_data_property.information = [data_property_meta.information]
+            emit_change(ontology, PROPERTY_ADDED, name, kind="data_property")
         else:
             print(f"Data property: {name} already exists")
             with data_property_namespace:
@@ -296,6 +317,7 @@ def create_data_properties(ontology: Ontology, data_properties: List[DataPropert
                 print(data_property_to_update)
                 data_property_to_update.location.append(f"doi: {data_property_meta.location[0]} - page: {data_property_meta.location[1]}")
                 data_property_to_update.information.append(data_property_meta.information)
+    embedding_store.flush()
 
 
 
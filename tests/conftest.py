@@ -0,0 +1,86 @@
+import importlib
+import os
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+import pytest
+from owlready2 import World, Thing, DataProperty, ObjectProperty
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ONTOLOGY_DIR = REPO_ROOT / "data" / "ontology"
+BASE_IRI = "http://www.test.org/chem_ontologies/"
+ONTOLOGY_IRI = f"{BASE_IRI}chem_ontology.owl"
+
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def define_metadata(ontology):
+    """SourcedInformation及其属性，与src/ontology/preprocess.py创建的一致"""
+    meta = ontology.get_namespace(f"{BASE_IRI}meta/")
+    with meta:
+        class SourcedInformation(Thing):
+            pass
+        for name in ("content", "source", "file_path", "type", "property"):
+            type(name, (DataProperty,), {"namespace": meta, "domain": [SourcedInformation], "range": [str]})
+
+        class has_information(ObjectProperty):
+            range = [SourcedInformation]
+    return meta
+
+
+def _project_root() -> str:
+    """config.settings从${PROJECT_ROOT}data/ontology/加载本体，测试使用临时目录中的空本体"""
+    root = tempfile.mkdtemp(prefix="autology_test_")
+    directory = os.path.join(root, "data", "ontology")
+    os.makedirs(directory)
+    world = World()
+    ontology = world.get_ontology(ONTOLOGY_IRI)
+    define_metadata(ontology)
+    ontology.save(os.path.join(directory, "chem_ontology.owl"))
+    world.close()
+    return root + os.sep
+
+
+os.environ.setdefault("PROJECT_ROOT", _project_root())
+
+
+def import_query_team(module: str):
+    """query_team/__init__会导入LangGraph工作流，版本不匹配时跳过包初始化，只加载分析模块"""
+    name = f"autology_constructor.idea.query_team.{module}"
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        pass
+    for package in ("autology_constructor.idea", "autology_constructor.idea.query_team"):
+        if package not in sys.modules:
+            placeholder = types.ModuleType(package)
+            placeholder.__path__ = [str(REPO_ROOT.joinpath(*package.split(".")))]
+            sys.modules[package] = placeholder
+    return importlib.import_module(name)
+
+
+def shipped_ontologies():
+    return sorted(ONTOLOGY_DIR.glob("backup-*.owl"))
+
+
+@pytest.fixture
+def world():
+    world = World()
+    yield world
+    world.close()
+
+
+@pytest.fixture
+def merge_ontology(world, monkeypatch):
+    """在独立World中的空本体上运行合并函数"""
+    from config.settings import ONTOLOGY_CONFIG
+
+    ontology = world.get_ontology(ONTOLOGY_IRI)
+    meta = define_metadata(ontology)
+    monkeypatch.setitem(ONTOLOGY_CONFIG, "ontology", ontology)
+    monkeypatch.setitem(ONTOLOGY_CONFIG, "meta", meta)
+    for namespace in ("classes", "individuals", "data_properties", "object_properties", "axioms"):
+        monkeypatch.setitem(ONTOLOGY_CONFIG, namespace, ontology.get_namespace(f"{BASE_IRI}{namespace}/"))
+    return ontology
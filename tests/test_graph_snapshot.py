@@ -0,0 +1,29 @@
+import pytest
+
+from conftest import import_query_team, shipped_ontologies
+
+OntologyTools = import_query_team("ontology_tools").OntologyTools
+
+
+@pytest.fixture
+def tools(world):
+    path = shipped_ontologies()[-1]
+    return OntologyTools(world.get_ontology("file://" + str(path)).load(only_local=True))
+
+
+def test_snapshot_of_shipped_ontology(tools):
+    """类位于classes/命名空间中，不能用onto[name]解析"""
+    snapshot = tools.get_graph_snapshot()
+    by_name = {c.name: c for c in tools.onto.classes()}
+    ids = {name: i for i, name in enumerate(snapshot.names)}
+    for name, onto_class in list(by_name.items())[:50]:
+        assert tools.onto[name] is None or tools.onto[name] is onto_class
+        assert snapshot.arrays["property_counts"][ids[name]] == len(tools.get_class_properties(name))
+    assert snapshot.arrays["property_counts"].sum() > 0
+
+
+def test_centrality_candidates_resolve(tools):
+    for candidate in tools.get_concept_centrality().top_k(5):
+        name = candidate["name"]
+        assert tools.get_class_properties(name)
+        assert tools.get_parents(name)
@@ -0,0 +1,66 @@
+import types
+
+import pytest
+from owlready2 import World, Thing, ObjectProperty
+
+from autology_constructor.module_extraction import extract_module
+from autology_constructor.ntriples import (
+    ontology_to_ntriples, parse_ntriples, file_to_ntriples, fingerprint_triples, load_ntriples
+)
+
+from conftest import ONTOLOGY_IRI, shipped_ontologies
+
+CLASSES = "http://www.test.org/chem_ontologies/classes/"
+
+
+def build_spaced(world):
+    """类名中含空格，与backup-4中的(Co4L6)8+ tetrahedron等类相同"""
+    onto = world.get_ontology("http://www.test.org/chem_ontologies/chem_ontology.owl")
+    namespace = onto.get_namespace(CLASSES)
+    with namespace:
+        cage = types.new_class("(Co4L6)8+ tetrahedron", (Thing,))
+        ligand = types.new_class("bis bidentate ligand", (Thing,))
+        unrelated = types.new_class("unrelated class", (Thing,))
+    with onto:
+        class has_part(ObjectProperty):
+            pass
+    cage.is_a.append(has_part.some(ligand))
+    cage.comment = ['quoted "text" with spaces']
+    return onto, cage, ligand, unrelated
+
+
+def test_parse_keeps_iris_with_spaces(world):
+    onto, cage, _, _ = build_spaced(world)
+    triples = list(parse_ntriples(ontology_to_ntriples(onto)))
+    subjects = {s for s, _, _ in triples}
+    assert f"<{cage.iri}>" in subjects
+    assert all(s[0] in "<_" and p[0] == "<" and o[0] in '<_"' for s, p, o in triples)
+    comment = [o for s, p, o in triples if s == f"<{cage.iri}>" and p.endswith("comment>")]
+    assert comment == ['"quoted \\"text\\" with spaces"^^<http://www.w3.org/2001/XMLSchema#string>']
+
+
+def test_module_keeps_subjects_with_spaces(world):
+    onto, cage, ligand, unrelated = build_spaced(world)
+    module = list(parse_ntriples(extract_module(onto, [cage])))
+    subjects = {s for s, _, _ in module}
+    assert f"<{cage.iri}>" in subjects
+    assert f"<{ligand.iri}>" in subjects
+    assert f"<{unrelated.iri}>" not in subjects
+    # 限制表达式完整保留
+    assert any(p.endswith("someValuesFrom>") and o == f"<{ligand.iri}>" for _, p, o in module)
+
+
+@pytest.mark.parametrize("path", shipped_ontologies(), ids=lambda p: p.name)
+def test_shipped_ontology_round_trip(path):
+    data = file_to_ntriples(str(path))
+    lines = [line for line in data.splitlines() if line.strip()]
+    triples = list(parse_ntriples(data))
+    # 每一行都解析为一个三元组
+    assert len(triples) == len(lines)
+
+    world = World()
+    try:
+        copy = load_ntriples(data, world, ONTOLOGY_IRI)
+        assert fingerprint_triples(parse_ntriples(ontology_to_ntriples(copy))) == fingerprint_triples(triples)
+    finally:
+        world.close()
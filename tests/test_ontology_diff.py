@@ -0,0 +1,49 @@
+from owlready2 import Thing, ObjectProperty, AllDisjoint
+
+from autology_constructor.ontology_diff import iter_diff, summarize
+
+from conftest import ONTOLOGY_DIR, ONTOLOGY_IRI
+
+
+def test_diff_between_shipped_backups_reports_named_entities():
+    diff = list(iter_diff(str(ONTOLOGY_DIR / "backup-3.owl"), str(ONTOLOGY_DIR / "backup-4.owl")))
+    assert diff
+    for entry in diff:
+        # 实体总是命名实体，描述中不出现匿名节点标签
+        assert not entry["entity"].startswith(('"', "_:"))
+        assert all("_:" not in change["description"] for change in entry["changes"])
+    summary = summarize(iter(diff))
+    assert summary["class"]["+"] > 0 and summary["restriction"]["+"] > 0
+
+
+def build(world, path, extra: bool):
+    onto = world.get_ontology(ONTOLOGY_IRI)
+    with onto:
+        class X(Thing): pass
+        class A(Thing): pass
+        class B(Thing): pass
+        class p(ObjectProperty): pass
+        A.is_a.append(p.some(X))
+        if extra:
+            B.is_a.append(p.some(X))
+            AllDisjoint([A, B, X])
+    onto.save(str(path))
+    return str(path)
+
+
+def test_diff_reports_restrictions_and_disjointness(tmp_path):
+    from owlready2 import World
+
+    old_world, new_world = World(), World()
+    try:
+        old = build(old_world, tmp_path / "old.owl", extra=False)
+        new = build(new_world, tmp_path / "new.owl", extra=True)
+    finally:
+        old_world.close()
+        new_world.close()
+
+    diff = {entry["entity"]: entry["changes"] for entry in iter_diff(old, new)}
+    assert {"op": "+", "category": "restriction", "description": "p some X"} in diff["B"]
+    for name in ("A", "B", "X"):
+        assert any(c["category"] == "disjoint" and c["op"] == "+" for c in diff[name])
+    assert "A" in diff and all(c["category"] == "disjoint" for c in diff["A"])
@@ -0,0 +1,73 @@
+from owlready2 import World, Thing, ObjectProperty
+
+from autology_constructor.ntriples import ontology_to_ntriples, parse_ntriples, fingerprint_triples
+from autology_constructor.ontology_journal import OntologyJournal
+
+from conftest import ONTOLOGY_IRI
+
+
+def fingerprint(ontology) -> str:
+    return fingerprint_triples(parse_ntriples(ontology_to_ntriples(ontology)))
+
+
+def reopen(path):
+    """模拟崩溃后重启：在新的World中加载快照并重放日志"""
+    world = World()
+    ontology = world.get_ontology("file://" + str(path)).load()
+    journal = OntologyJournal(ontology, str(path))
+    return world, ontology, journal
+
+
+def setup(tmp_path, world):
+    path = tmp_path / "chem_ontology.owl"
+    onto = world.get_ontology(ONTOLOGY_IRI)
+    with onto:
+        class X(Thing): pass
+        class Y(Thing): pass
+        class p(ObjectProperty): pass
+    onto.save(str(path))
+    return path, onto, OntologyJournal(onto, str(path))
+
+
+def test_replay_restores_committed_changes(tmp_path, world):
+    path, onto, journal = setup(tmp_path, world)
+    with onto:
+        class A(Thing): pass
+        A.is_a.append(onto.p.some(onto.X))
+    journal.commit()
+    # 未提交的修改在崩溃时丢失
+    with onto:
+        class B(Thing): pass
+
+    replay_world, replayed, _ = reopen(path)
+    try:
+        names = {c.name for c in replayed.classes()}
+        assert "A" in names and "B" not in names
+        assert [str(r) for r in replayed.A.is_a if not isinstance(r, type)] == ["chem_ontology.p.some(chem_ontology.X)"]
+    finally:
+        replay_world.close()
+
+
+def test_blank_nodes_from_before_a_snapshot_are_not_journaled(tmp_path, world):
+    path, onto, journal = setup(tmp_path, world)
+    with onto:
+        class A(Thing): pass
+        class C(Thing): pass
+        A.is_a.append(onto.p.some(onto.X))
+        C.is_a.append(onto.p.some(onto.X))
+    journal.commit()
+    journal.compact(background=False)
+
+    # 修改压缩前创建的限制（匿名节点）：不能以过期的日志标签写入日志
+    A.is_a[-1].value = onto.Y
+    C.is_a.remove(C.is_a[-1])
+    journal.commit()
+    expected = fingerprint(onto)
+
+    replay_world, replayed, _ = reopen(path)
+    try:
+        assert fingerprint(replayed) == expected
+        assert [str(r) for r in replayed.A.is_a if not isinstance(r, type)] == ["chem_ontology.p.some(chem_ontology.Y)"]
+        assert all(isinstance(r, type) for r in replayed.C.is_a)
+    finally:
+        replay_world.close()
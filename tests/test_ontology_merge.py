@@ -0,0 +1,147 @@
+from owlready2 import Restriction, ThingClass
+
+from autology_constructor import base_data_structures as bds
+from autology_constructor.change_feed import get_change_feed, PROVENANCE_ADDED
+from autology_constructor.provenance_store import get_provenance
+
+SOURCE = "https://doi.org/10.0000/test"
+FILE_PATH = "paper.md"
+
+
+def merge(ontology_entities=None, ontology_elements=None, data_properties=None, object_properties=None):
+    from autology_constructor.ontology_merge import merge_ontology
+    return merge_ontology(ontology_entities, ontology_elements, data_properties, object_properties, SOURCE, FILE_PATH)
+
+
+def entities(*names):
+    return bds.OntologyEntities(entities=[bds.Entity(name=n, information=f"{n} info") for n in names])
+
+
+def test_entities_get_provenance_and_events(merge_ontology):
+    feed = get_change_feed(merge_ontology)
+    start = feed.version
+    merge(entities("cage", "ligand"))
+
+    classes = merge_ontology.get_namespace("http://www.test.org/chem_ontologies/classes/")
+    assert classes.cage is not None and classes.ligand is not None
+    assert get_provenance(merge_ontology).contents(classes.cage.iri, SOURCE) == ["cage info"]
+    provenance_events = [e for e in feed.changes_since(start) if e.type == PROVENANCE_ADDED]
+    assert {e.subject for e in provenance_events} == {"cage", "ligand"}
+    assert provenance_events[0].details["info_type"] == "entity"
+
+
+def test_data_property_values_are_stored(merge_ontology):
+    merge(entities("cage"))
+    merge(data_properties=bds.OntologyDataProperties(data_properties=[
+        bds.DataProperty(name="melting_point", values={"cage": "300 K"})
+    ]))
+    classes = merge_ontology.get_namespace("http://www.test.org/chem_ontologies/classes/")
+    assert classes.cage.melting_point == ["300 K"]
+
+    # 重复合并不重复写入值
+    merge(data_properties=bds.OntologyDataProperties(data_properties=[
+        bds.DataProperty(name="melting_point", values={"cage": ["300 K", "310 K"]})
+    ]))
+    assert sorted(classes.cage.melting_point) == ["300 K", "310 K"]
+
+
+def test_existing_properties_are_not_announced_again(merge_ontology):
+    from autology_constructor.change_feed import PROPERTY_ADDED
+
+    merge(entities("cage", "anion"))
+    data_properties = bds.OntologyDataProperties(data_properties=[
+        bds.DataProperty(name="melting_point", values={"cage": "300 K"})
+    ])
+    object_properties = bds.OntologyObjectProperties(object_properties=[
+        bds.ObjectProperty(name="has_part", instances=[bds.ObjectPropertyInstance(
+            domain=bds.Domain(entity="cage", type="single"),
+            range=bds.Range(entity="anion", type="single")
+        )])
+    ])
+    feed = get_change_feed(merge_ontology)
+    start = feed.version
+    merge(data_properties=data_properties, object_properties=object_properties)
+    added = [e.subject for e in feed.changes_since(start) if e.type == PROPERTY_ADDED]
+    assert sorted(added) == ["has_part", "melting_point"]
+
+    # 第二轮合并时属性已存在，不再发出属性新增事件
+    start = feed.version
+    merge(data_properties=data_properties, object_properties=object_properties)
+    assert [e for e in feed.changes_since(start) if e.type == PROPERTY_ADDED] == []
+
+
+def has_part(domain, range, domain_type="single", range_type="single", restriction="some"):
+    return bds.OntologyObjectProperties(object_properties=[bds.ObjectProperty(name="has_part", instances=[
+        bds.ObjectPropertyInstance(
+            domain=bds.Domain(entity=domain, type=domain_type),
+            range=bds.Range(entity=range, type=range_type),
+            restriction=restriction
+        )
+    ])])
+
+
+def restrictions(cls):
+    return [r for r in cls.is_a if isinstance(r, Restriction) and r.property.name == "has_part"]
+
+
+def test_restriction_is_written_once(merge_ontology):
+    merge(entities("cage", "anion"))
+    merge(object_properties=has_part("cage", "anion"))
+    merge(object_properties=has_part("cage", "anion"))
+
+    classes = merge_ontology.get_namespace("http://www.test.org/chem_ontologies/classes/")
+    assert [str(r) for r in restrictions(classes.cage)] == ["object_properties.has_part.some(classes.anion)"]
+    records = [r for r in get_provenance(merge_ontology).records(classes.cage.iri) if r.get("property") == "has_part"]
+    assert len(records) == 1
+
+    # 不同值域是另一条限制
+    merge(object_properties=has_part("cage", "anion", restriction="only"))
+    assert len(restrictions(classes.cage)) == 2
+
+
+def test_composite_domain_is_reused(merge_ontology):
+    merge(entities("cage", "ligand", "anion", "cation"))
+    merge(object_properties=has_part("cage, ligand", "anion", domain_type="intersection"))
+    merge(object_properties=has_part("cage, ligand", "cation", domain_type="intersection"))
+
+    classes = merge_ontology.get_namespace("http://www.test.org/chem_ontologies/classes/")
+    composites = [c for c in merge_ontology.classes() if c.name.startswith("intersection_of_")]
+    assert [c.name for c in composites] == ["intersection_of_cage_ligand"]
+    composite = composites[0]
+    assert composite.equivalent_to == [classes.cage & classes.ligand]
+    assert len(restrictions(composite)) == 2
+
+    # 数据属性值的交集类复用同一个命名类
+    merge(data_properties=bds.OntologyDataProperties(data_properties=[
+        bds.DataProperty(name="melting_point", values={"cage with ligand": "300 K"})
+    ]))
+    assert [c.name for c in merge_ontology.classes() if c.name.startswith("intersection_of_")] == ["intersection_of_cage_ligand"]
+    assert composite.melting_point == ["300 K"]
+
+
+def test_disjointness_is_written_once(merge_ontology):
+    merge(entities("cage", "anion", "cation"))
+    pairs = [bds.Disjointness(class1="cage", class2="anion"), bds.Disjointness(class1="anion", class2="cage")]
+    merge(ontology_elements=bds.OntologyElements(disjointness=pairs))
+    merge(ontology_elements=bds.OntologyElements(disjointness=pairs[:1]))
+    assert len(list(merge_ontology.disjoints())) == 1
+
+    merge(ontology_elements=bds.OntologyElements(disjointness=[bds.Disjointness(class1="cage", class2="cation")]))
+    classes = merge_ontology.get_namespace("http://www.test.org/chem_ontologies/classes/")
+    disjoint = {c.name for d in classes.cage.disjoints() for c in d.entities} - {"cage"}
+    assert disjoint == {"anion", "cation"}
+
+
+def test_hierarchy_links_existing_classes(merge_ontology):
+    merge(entities("cage", "host", "container"))
+    hierarchy = [bds.Hierarchy(subclass="cage", superclass=["host"], information="cages are hosts")]
+    merge(ontology_elements=bds.OntologyElements(hierarchy=hierarchy))
+    merge(ontology_elements=bds.OntologyElements(hierarchy=hierarchy))
+    classes = merge_ontology.get_namespace("http://www.test.org/chem_ontologies/classes/")
+    assert [c for c in classes.cage.is_a if isinstance(c, ThingClass)] == [classes.host]
+
+    # 任一父类不存在时整条层级关系不写入
+    merge(ontology_elements=bds.OntologyElements(hierarchy=[
+        bds.Hierarchy(subclass="cage", superclass=["container", "missing"])
+    ]))
+    assert classes.container not in classes.cage.is_a
@@ -0,0 +1,88 @@
+import pytest
+from owlready2 import ThingClass, Restriction
+
+from conftest import import_query_team, shipped_ontologies
+
+OntologyTools = import_query_team("ontology_tools").OntologyTools
+
+
+@pytest.fixture(scope="module")
+def tools():
+    from owlready2 import World
+
+    world = World()
+    path = shipped_ontologies()[-1]
+    yield OntologyTools(world.get_ontology("file://" + str(path)).load(only_local=True))
+    world.close()
+
+
+def baseline_related(cls, object_properties):
+    """原get_related_classes：逐个对象属性扫描类的限制和属性值"""
+    relations = {}
+    for prop in object_properties:
+        related = []
+        for r in cls.is_a:
+            if isinstance(r, Restriction) and r.property == prop:
+                if isinstance(r.value, ThingClass):
+                    related.append(r.value.name)
+                elif hasattr(r.value, "__iter__"):
+                    related.extend(v.name for v in r.value if isinstance(v, ThingClass))
+        values = getattr(cls, prop.python_name, [])
+        values = values if isinstance(values, list) else [values]
+        related.extend(v.name for v in values if isinstance(v, ThingClass))
+        if related:
+            relations[prop.name] = sorted(set(related))
+    return relations
+
+
+def baseline_paths(related, start_class, end_class, max_depth):
+    """原get_property_path的深度优先搜索"""
+    paths = []
+    visited = set()
+
+    def dfs(current, path, depth):
+        if depth > max_depth:
+            return
+        if current == end_class:
+            paths.append(path[:])
+            return
+        if current in visited:
+            return
+        visited.add(current)
+        for prop_name, targets in related.get(current, {}).items():
+            for target in targets:
+                if target not in visited:
+                    dfs(target, path + [prop_name], depth + 1)
+        visited.remove(current)
+
+    dfs(start_class, [], 0)
+    return paths
+
+
+def test_closure_matches_owlready_ancestors(tools):
+    for cls in tools.onto.classes():
+        assert set(tools.get_ancestors(cls.name)) == {c.name for c in cls.ancestors() if isinstance(c, ThingClass)}
+        assert set(tools.get_descendants(cls.name)) == {c.name for c in cls.descendants() if isinstance(c, ThingClass)}
+
+
+def test_adjacency_matches_baseline(tools):
+    object_properties = list(tools.onto.object_properties())
+    for cls in tools.onto.classes():
+        assert tools.get_related_classes(cls.name) == baseline_related(cls, object_properties)
+
+
+def test_property_paths_match_baseline(tools):
+    object_properties = list(tools.onto.object_properties())
+    related = {cls.name: baseline_related(cls, object_properties) for cls in tools.onto.classes()}
+    starts = [name for name, relations in related.items() if relations]
+    ends = sorted({target for relations in related.values() for targets in relations.values() for target in targets})
+    compared = 0
+    for start in starts:
+        for end in ends:
+            expected = baseline_paths(related, start, end, 4)
+            paths = tools.get_property_path(start, end, max_depth=4)
+            assert sorted(paths) == sorted(expected)
+            # 最短路径优先产出
+            assert [len(p) for p in paths] == sorted(len(p) for p in paths)
+            compared += bool(expected)
+    assert compared > 0
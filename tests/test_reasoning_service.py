@@ -0,0 +1,56 @@
+import shutil
+
+import pytest
+from owlready2 import World
+
+from autology_constructor.module_extraction import extract_module
+from autology_constructor.ntriples import (
+    ontology_to_ntriples, parse_ntriples, fingerprint_triples, load_ntriples
+)
+from autology_constructor.reasoning_service import REASONING_IRI, ReasoningService
+
+from conftest import shipped_ontologies
+
+
+def load_shipped(world, path):
+    return world.get_ontology("file://" + str(path)).load(only_local=True)
+
+
+@pytest.mark.parametrize("path", shipped_ontologies(), ids=lambda p: p.name)
+def test_reasoner_copy_round_trips_shipped_ontology(world, path):
+    """推理进程中的副本与原本体三元组一致（含IRI带空格的类）"""
+    data = ontology_to_ntriples(load_shipped(world, path))
+    copy_world = World()
+    try:
+        copy = load_ntriples(data, copy_world, REASONING_IRI)
+        assert fingerprint_triples(parse_ntriples(ontology_to_ntriples(copy))) == fingerprint_triples(parse_ntriples(data))
+    finally:
+        copy_world.close()
+
+
+def test_module_copy_loads_classes_with_spaces(world):
+    onto = load_shipped(world, shipped_ontologies()[-1])
+    seeds = [c for c in onto.classes() if " " in c.name][:5]
+    assert seeds
+    copy_world = World()
+    try:
+        module = load_ntriples(extract_module(onto, seeds), copy_world, REASONING_IRI)
+        names = {c.name for c in module.classes()}
+        assert {c.name for c in seeds} <= names
+    finally:
+        copy_world.close()
+
+
+@pytest.mark.skipif(shutil.which("java") is None, reason="Pellet需要Java")
+def test_reasoning_on_shipped_ontology(world):
+    import owlready2
+
+    owlready2.JAVA_EXE = shutil.which("java")
+    onto = load_shipped(world, shipped_ontologies()[-1])
+    service = ReasoningService(timeout=600)
+    try:
+        result = service.reason(onto)
+        assert "consistent" in result and not result["cached"]
+        assert service.reason(onto)["cached"]
+    finally:
+        service.close()
@@ -0,0 +1,11 @@
+import os
+
+
+def test_importing_settings_creates_no_search_index():
+    from config.settings import ONTOLOGY_CONFIG
+    from autology_constructor.provenance_search import get_ontology_provenance_search_index
+
+    assert not ONTOLOGY_CONFIG["provenance_search_db_path"]
+    assert get_ontology_provenance_search_index(ONTOLOGY_CONFIG["ontology"]) is None
+    directory = os.path.join(os.environ["PROJECT_ROOT"], "data", "ontology")
+    assert not any(name.startswith("provenance_search") for name in os.listdir(directory))
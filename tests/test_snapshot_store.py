@@ -0,0 +1,57 @@
+import re
+
+import pytest
+from owlready2 import World, Thing, ObjectProperty, AllDisjoint
+
+from autology_constructor.ntriples import (
+    file_to_ntriples, fingerprint_triples, parse_ntriples, load_ntriples
+)
+from autology_constructor.snapshot_store import SnapshotStore
+
+from conftest import ONTOLOGY_IRI, shipped_ontologies
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("path", shipped_ontologies()[-2:], ids=lambda p: p.name)
+def test_restore_shipped_ontology(store, tmp_path, path):
+    snapshot_id = store.commit_file(str(path))
+    assert snapshot_id == fingerprint_triples(parse_ntriples(file_to_ntriples(str(path))))
+
+    # 恢复出的匿名节点都是规范化标签，不残留序列化时的编号
+    assert not re.search(rb"_:\d+ ", store.restore(snapshot_id))
+
+    restored = tmp_path / "restored.owl"
+    store.restore_to_file(snapshot_id, str(restored), ONTOLOGY_IRI)
+    assert fingerprint_triples(parse_ntriples(file_to_ntriples(str(restored)))) == snapshot_id
+    # 恢复的文件再次提交得到同一快照
+    assert store.commit_file(str(restored)) == snapshot_id
+
+
+def test_identical_restrictions_on_different_classes_stay_separate(store, world):
+    onto = world.get_ontology(ONTOLOGY_IRI)
+    with onto:
+        class X(Thing): pass
+        class A(Thing): pass
+        class B(Thing): pass
+        class p(ObjectProperty): pass
+        A.is_a.append(p.some(X))
+        B.is_a.append(p.some(X))
+        AllDisjoint([A, B, X])
+    snapshot_id = store.commit_ontology(onto)
+
+    restore_world = World()
+    try:
+        restored = load_ntriples(store.restore(snapshot_id), restore_world, ONTOLOGY_IRI)
+        by_name = {c.name: c for c in restored.classes()}
+        assert [str(r) for r in by_name["A"].is_a[1:]] == [str(r) for r in by_name["B"].is_a[1:]]
+        assert by_name["A"].is_a[1] is not by_name["B"].is_a[1]
+        assert len(list(restored.disjoints())) == 1
+        assert store.commit_ontology(restored) == snapshot_id
+    finally:
+        restore_world.close()
@@ -0,0 +1,32 @@
+from owlready2 import Thing, ObjectProperty
+
+from conftest import ONTOLOGY_IRI, import_query_team
+
+SparqlExecutor = import_query_team("sparql_executor").SparqlExecutor
+
+
+def build(world):
+    onto = world.get_ontology(ONTOLOGY_IRI)
+    with onto:
+        class host(Thing): pass
+        class cage(host): pass
+        class anion(Thing): pass
+        class binds(ObjectProperty): pass
+        cage.is_a.append(binds.some(anion))
+    return onto
+
+
+def test_rows_are_keyed_by_projected_variables(world):
+    executor = SparqlExecutor(build(world))
+    results = executor.query("SELECT ?child ?parent WHERE { ?child rdfs:subClassOf ?parent . ?parent a owl:Class }")
+    assert results["variables"] == ["child", "parent"]
+    assert {"child": "cage", "parent": "host"} in results["results"]
+
+
+def test_aggregate_and_select_star_variables(world):
+    executor = SparqlExecutor(build(world))
+    results = executor.query("SELECT (COUNT(?c) AS ?n) WHERE { ?c a owl:Class }")
+    assert results["variables"] == ["n"]
+    assert results["results"] == [{"n": "3"}]
+    results = executor.query("SELECT * WHERE { ?x rdfs:subClassOf ?y . ?y a owl:Class }")
+    assert set(results["results"][0]) == set(results["variables"]) == {"x", "y"}